@@ -1,4 +1,6 @@
+import hashlib
 import os
+import time
 from typing import Final
 
 import jwt
@@ -6,20 +8,41 @@ from dotenv import load_dotenv
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
+from api.cache import LRUCache, register_cache
+
 load_dotenv()
 JWT_SECRET_KEY: Final = os.getenv("JWT_SECRET_KEY")
 JWT_ALGORITHM: Final = os.getenv("JWT_ALGORITHM")
+AUTH_CACHE_MAX_SIZE: Final = int(os.getenv("AUTH_CACHE_MAX_SIZE", "10000"))
+# Only used for tokens without an exp claim.
+AUTH_CACHE_TTL_SECONDS: Final = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "300"))
 
 security = HTTPBearer()
 
+# Verified payloads by token digest, so a token is decoded and HMAC-checked
+# once rather than on every request it is reused for.
+token_cache = register_cache("tokens", LRUCache(max_size=AUTH_CACHE_MAX_SIZE))
+
 
-def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     token = credentials.credentials
-    try:
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+    key = hashlib.sha256(token.encode()).digest()
 
+    payload = token_cache.get(key)
+    # Same rule as jwt.decode: the token is expired once now >= exp.
+    if payload is not None and ("exp" not in payload or time.time() < payload["exp"]):
         return payload
+
+    try:
+        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token"
         )
+
+    if "exp" in payload:
+        token_cache.set(key, payload, ttl=payload["exp"] - time.time())
+    else:
+        token_cache.set(key, payload, ttl=AUTH_CACHE_TTL_SECONDS)
+
+    return payload
@@ -0,0 +1,32 @@
+import os
+from typing import Final
+
+from pydantic import BaseModel, Field
+
+BATCH_MAX_SIZE: Final = int(os.getenv("BATCH_MAX_SIZE", "500"))
+
+
+class BatchGetReq(BaseModel):
+    ids: list[str] = Field(
+        strict=True,
+        min_length=1,
+        max_length=BATCH_MAX_SIZE,
+        json_schema_extra={"format": "array"},
+    )
+
+
+def unique_ids(ids: list[str]) -> list[str]:
+    """Drop repeated ids, keeping the order of first appearance."""
+    return list(dict.fromkeys(ids))
+
+
+def order_by_ids(rows: list[dict], ids: list[str]) -> tuple[list[dict], list[str]]:
+    """
+    Arrange the rows of an `id = ANY(...)` lookup in the order of `ids`, which
+    must be unique, and list the ids no row was found for.
+    """
+    by_id = {row["id"]: row for row in rows}
+    found = [by_id[id] for id in ids if id in by_id]
+    missing = [id for id in ids if id not in by_id]
+
+    return found, missing
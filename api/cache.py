@@ -0,0 +1,151 @@
+import os
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any, Final, Protocol
+
+CACHE_MAX_SIZE: Final = int(os.getenv("CACHE_MAX_SIZE", "10000"))
+CACHE_TTL_SECONDS: Final = float(os.getenv("CACHE_TTL_SECONDS", "60"))
+
+
+class Cache(Protocol):
+    def get(self, key: Hashable) -> Any | None: ...
+
+    def generation(self, key: Hashable) -> int: ...
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl: float | None = None,
+        generation: int | None = None,
+        settle: float = 0.0,
+    ) -> None: ...
+
+    def invalidate(self, key: Hashable) -> None: ...
+
+    def clear(self) -> None: ...
+
+    def stats(self) -> dict[str, int]: ...
+
+
+class LRUCache:
+    """
+    Size-bounded LRU cache whose entries also expire after a TTL.
+
+    A loader reads `generation(key)` before it queries and passes it to `set`,
+    which drops the value if the key was invalidated, or the cache cleared,
+    in between: the row it read may predate the write that invalidated it.
+    Generations come from one counter. Invalidations are remembered for the
+    last `max_size` keys, and the epoch stands in for the generation of every
+    key that was forgotten or never invalidated.
+
+    Each invalidation is also timestamped, so `set(..., settle=)` can refuse
+    values read from a replica that may not have applied the write yet.
+
+    Not thread-safe; it is only touched from the event loop.
+    """
+
+    def __init__(self, max_size: int = CACHE_MAX_SIZE, ttl: float | None = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stale_fills = 0
+        self._entries: OrderedDict[Hashable, tuple[float | None, Any]] = OrderedDict()
+        self._counter = 0
+        # (generation, monotonic time of the invalidation)
+        self._epoch: tuple[int, float] = (0, float("-inf"))
+        self._invalidated: OrderedDict[Hashable, tuple[int, float]] = OrderedDict()
+
+    def get(self, key: Hashable) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._entries[key]
+            self.evictions += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def generation(self, key: Hashable) -> int:
+        return self._invalidated.get(key, self._epoch)[0]
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl: float | None = None,
+        generation: int | None = None,
+        settle: float = 0.0,
+    ) -> None:
+        """
+        Drop the value if `generation` is given and the key has been
+        invalidated since, or if it was invalidated less than `settle`
+        seconds ago.
+        """
+        invalidated, invalidated_at = self._invalidated.get(key, self._epoch)
+        if (generation is not None and generation != invalidated) or (
+            time.monotonic() - invalidated_at < settle
+        ):
+            self.stale_fills += 1
+            return
+
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = None if ttl is None else time.monotonic() + ttl
+
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+        self._counter += 1
+        self._invalidated[key] = (self._counter, time.monotonic())
+        self._invalidated.move_to_end(key)
+        while len(self._invalidated) > self.max_size:
+            # The forgotten key falls back to the epoch, which must not be
+            # older than its invalidation, or a load that started before it
+            # could fill the key.
+            _, self._epoch = self._invalidated.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+        self._counter += 1
+        self._epoch = (self._counter, time.monotonic())
+        self._invalidated.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "stale_fills": self.stale_fills,
+        }
+
+
+# Every cache the routers read through, by name, for stats and invalidation.
+caches: dict[str, Cache] = {}
+
+
+def register_cache(name: str, cache: Cache | None = None) -> Cache:
+    """Register `cache` under `name`, defaulting to an LRUCache from the env settings."""
+    if cache is None:
+        cache = LRUCache(max_size=CACHE_MAX_SIZE, ttl=CACHE_TTL_SECONDS)
+    caches[name] = cache
+
+    return cache
@@ -0,0 +1,93 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request, status
+from fastapi.responses import Response
+
+from api.rows import Row
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.blake2b(
+        ":".join(str(part) for part in parts).encode(), digest_size=12
+    )
+
+    return f'W/"{digest.hexdigest()}"'
+
+
+def modified_at(row: dict | Row) -> datetime:
+    if isinstance(row, Row):
+        return row.modified_at
+
+    return row["updated_at"] or row["created_at"]
+
+
+def page_etag(
+    count: int,
+    last_modified: datetime | None,
+    first_id: str | None,
+    last_id: str | None,
+) -> str:
+    """
+    Validator for a keyset page. Any insert, update or delete inside the page
+    changes its count, newest timestamp or id bounds.
+    """
+    return make_etag(count, last_modified, first_id, last_id)
+
+
+def rows_validators(rows: list[dict]) -> tuple[str, datetime | None]:
+    """The `page_etag` and Last-Modified of already fetched rows."""
+    if not rows:
+        return page_etag(0, None, None, None), None
+
+    last_modified = max(modified_at(row) for row in rows)
+
+    return page_etag(
+        len(rows), last_modified, rows[0]["id"], rows[-1]["id"]
+    ), last_modified
+
+
+def is_conditional(request: Request) -> bool:
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def is_not_modified(
+    request: Request, etag: str, last_modified: datetime | None
+) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match wins over If-Modified-Since and compares weakly.
+        if if_none_match.strip() == "*":
+            return True
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return etag.removeprefix("W/") in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+
+    return last_modified.replace(microsecond=0) <= since
+
+
+def validator_headers(etag: str, last_modified: datetime | None) -> dict[str, str]:
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(
+            last_modified.astimezone(timezone.utc), usegmt=True
+        )
+
+    return headers
+
+
+def not_modified(etag: str, last_modified: datetime | None) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers=validator_headers(etag, last_modified),
+    )
@@ -1,39 +1,337 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import csv
+import io
+from datetime import datetime
+from typing import Final, Literal
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from fastapi.encoders import jsonable_encoder
-from fastapi.responses import ORJSONResponse
-from psycopg.rows import dict_row
+from fastapi.responses import Response, StreamingResponse
+from psycopg.rows import dict_row, tuple_row
+from pydantic import ValidationError
 from ulid import ULID
 
 from api.auth_middleware import verify_token
+from api.batch import BatchGetReq, order_by_ids, unique_ids
+from api.cache import register_cache
+from api.conditional import (
+    is_conditional,
+    is_not_modified,
+    make_etag,
+    modified_at,
+    not_modified,
+    page_etag,
+    rows_validators,
+    validator_headers,
+)
 from api.food.schema import (
     AddFoodReq,
     AllFoodsResp,
+    BatchFoodsResp,
+    BulkAddFoodResp,
     DeleteFoodResp,
+    ExpandedFood,
     Food,
+    FoodSearchHit,
+    SearchFoodsResp,
     UpdateFoodReq,
     UpdateFoodResp,
 )
+from api.pagination import DEFAULT_LIMIT, MAX_LIMIT, decode_cursor, split_page
+from api.replica import cache_settle_seconds, pinned_to_primary, read_pool_for
+from api.rows import FoodRow, FoodSearchRow, RowLayout
+from api.singleflight import register_flight
+from api.timing import TimedJSONResponse, timed
+from api.ulids import monotonic_ulids
+from api.updates import register_update
 from db import pool
 
 food_router = APIRouter(prefix="/foods", tags=["foods"])
 
+food_cache = register_cache("foods")
+food_flight = register_flight("foods")
+
+FOOD_ROW: Final = RowLayout(Food, FoodRow)
+SEARCH_ROW: Final = RowLayout(FoodSearchHit, FoodSearchRow)
+FOOD_FIELDS: Final = FOOD_ROW.columns
+FOOD_COLUMNS: Final = FOOD_ROW.select
+
+# ?expand= name -> (table, foreign key on foods, embedded columns)
+EXPANSIONS: Final = {
+    "owner": ("owners", "owner_id", ("id", "image", "name")),
+    "location": (
+        "locations",
+        "location_id",
+        ("id", "district", "city", "province", "postal_code", "details"),
+    ),
+}
+
+food_update = register_update("foods", UpdateFoodReq, returning=FOOD_COLUMNS)
+
+EXPORT_CHUNK_SIZE: Final = 5_000
+
+# How many skipped records POST /foods/bulk describes; `failed` counts them all.
+BULK_MAX_ERRORS: Final = 100
+
+# ?sort= -> the keys foods are ordered and paged by, id last as a tiebreaker.
+SORT_KEYS: Final = {"id": ("id",), "price": ("price", "id")}
+
 
 @food_router.get("/", response_model=AllFoodsResp)
-def get_all_foods():
+async def get_all_foods(
+    request: Request,
+    limit: int = Query(default=DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    after: str | None = None,
+    expand: str | None = None,
+    sort: Literal["id", "price"] = "id",
+    min_price: int | None = Query(default=None, ge=0),
+    max_price: int | None = Query(default=None, ge=0),
+    location_id: str | None = None,
+):
+    """
+    `?expand=owner,location` side-loads the related entities of the page under
+    `included`, each owner and location once, from the same query.
+
+    `?sort=price` orders cheapest first. `min_price`, `max_price` and
+    `location_id` narrow the list, and with `location_id` a price sort or range
+    is one range scan of the (location_id, price, id) index.
+    """
     try:
-        with (
-            pool.connection() as conn,
-            conn.cursor(row_factory=dict_row) as cur,
+        expand = _parse_expand(expand)
+        keys = SORT_KEYS[sort]
+        conditions = []
+        params = []
+        if location_id is not None:
+            conditions.append("foods.location_id = %s")
+            params.append(location_id)
+        if min_price is not None:
+            conditions.append("foods.price >= %s")
+            params.append(min_price)
+        if max_price is not None:
+            conditions.append("foods.price <= %s")
+            params.append(max_price)
+        if after is not None:
+            after_keys = decode_cursor(after)
+            if len(after_keys) != len(keys):
+                raise ValueError("invalid cursor")
+            conditions.append(
+                f"({', '.join(f'foods.{key}' for key in keys)}) "
+                f"> ({', '.join(['%s'] * len(keys))})"
+            )
+            params += after_keys
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        order_by = ", ".join(f"foods.{key}" for key in keys)
+        params.append(limit + 1)
+
+        async with (
+            read_pool_for(request).connection() as conn,
+            conn.cursor(row_factory=dict_row if expand else FOOD_ROW) as cur,
         ):
-            query = """
-                SELECT * FROM foods;
+            if is_conditional(request) and not expand:
+                # The ids of the page's first and last rows, as rows_validators
+                # picks them.
+                first = ", ".join(keys)
+                last = ", ".join(f"{key} DESC" for key in keys)
+                query = f"""
+                    SELECT count(*) AS count, max(modified_at) AS last_modified,
+                           (array_agg(id ORDER BY {first}))[1] AS first_id,
+                           (array_agg(id ORDER BY {last}))[1] AS last_id
+                    FROM (
+                        SELECT {first},
+                               coalesce(updated_at, created_at) AS modified_at
+                        FROM foods {where} ORDER BY {order_by} LIMIT %s
+                    ) AS page;
+                """
+                async with conn.cursor(row_factory=dict_row) as validators:
+                    await validators.execute(query, params, prepare=True)
+                    page = await validators.fetchone()
+                etag = page_etag(**page)
+                if is_not_modified(request, etag, page["last_modified"]):
+                    return not_modified(etag, page["last_modified"])
+
+            columns, joins = _expand_query(expand)
+            query = f"""
+                SELECT {columns} FROM foods {joins}
+                {where} ORDER BY {order_by} LIMIT %s;
             """
-            foods = cur.execute(query).fetchall()
+            await cur.execute(query, params, prepare=True)
+            foods = await cur.fetchall()
+
+        etag, last_modified = rows_validators(foods)
+        if expand:
+            related_modified = [at for food in foods for at in _nest(food, expand)]
+            if related_modified:
+                last_modified = max(last_modified, *related_modified)
+            etag = make_etag(etag, *expand, last_modified)
+            if is_not_modified(request, etag, last_modified):
+                return not_modified(etag, last_modified)
+
+        foods, next_cursor = split_page(foods, limit, *keys)
+        content = {
+            "count": len(foods),
+            "data": foods,
+            "next_cursor": next_cursor,
+        }
+        if expand:
+            content["included"] = _side_load(foods, expand)
+
+        return TimedJSONResponse(
+            content=content,
+            status_code=status.HTTP_200_OK,
+            headers=validator_headers(etag, last_modified),
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+
+
+def _parse_expand(expand: str | None) -> list[str]:
+    if not expand:
+        return []
+
+    names = sorted({name.strip() for name in expand.split(",")})
+    unknown = [name for name in names if name not in EXPANSIONS]
+    if unknown:
+        raise ValueError(f"cannot expand {', '.join(unknown)}")
+
+    return names
+
+
+def _expand_query(expand: list[str]) -> tuple[str, str]:
+    """
+    The select list and joins that fetch foods with their `expand`ed relations,
+    whose columns come back flattened as `relation.column`.
+    """
+    columns = [f"foods.{col}" for col in FOOD_FIELDS]
+    joins = []
+    for name in expand:
+        table, foreign_key, fields = EXPANSIONS[name]
+        columns += [f'{name}.{col} AS "{name}.{col}"' for col in fields]
+        columns.append(
+            f'coalesce({name}.updated_at, {name}.created_at) AS "{name}.modified_at"'
+        )
+        joins.append(f"JOIN {table} AS {name} ON {name}.id = foods.{foreign_key}")
+
+    return ", ".join(columns), " ".join(joins)
+
 
-        return ORJSONResponse(
+def _nest(food: dict, expand: list[str]) -> list[datetime]:
+    """
+    Fold the flattened `relation.column` fields of a row into nested objects,
+    returning when each related row was last modified.
+    """
+    modified = []
+    for name in expand:
+        fields = EXPANSIONS[name][2]
+        food[name] = {col: food.pop(f"{name}.{col}") for col in fields}
+        modified.append(food.pop(f"{name}.modified_at"))
+
+    return modified
+
+
+def _side_load(foods: list[dict], expand: list[str]) -> dict[str, list[dict]]:
+    included = {}
+    for name in expand:
+        related = {}
+        for food in foods:
+            entity = food.pop(name)
+            related.setdefault(entity["id"], entity)
+        included[f"{name}s"] = list(related.values())
+
+    return included
+
+
+@food_router.get("/export")
+async def export_foods(request: Request, format: Literal["ndjson", "csv"] = "ndjson"):
+    async def stream():
+        # A named cursor keeps the result set on the server, so only one chunk
+        # of rows lives in worker memory at a time regardless of table size.
+        async with (
+            read_pool_for(request).connection() as conn,
+            conn.transaction(),
+            conn.cursor("foods_export", row_factory=tuple_row) as cur,
+        ):
+            query = f"""
+                SELECT {FOOD_COLUMNS} FROM foods;
+            """
+            await cur.execute(query)
+            columns = [col.name for col in cur.description]
+
+            if format == "csv":
+                yield _csv_chunk([columns])
+
+            while rows := await cur.fetchmany(EXPORT_CHUNK_SIZE):
+                if format == "csv":
+                    yield _csv_chunk(rows)
+                else:
+                    yield b"".join(
+                        orjson.dumps(
+                            dict(zip(columns, row)), option=orjson.OPT_APPEND_NEWLINE
+                        )
+                        for row in rows
+                    )
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/csv" if format == "csv" else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="foods.{format}"'},
+    )
+
+
+def _csv_chunk(rows) -> bytes:
+    buf = io.StringIO()
+    csv.writer(buf).writerows(
+        [val.isoformat() if hasattr(val, "isoformat") else val for val in row]
+        for row in rows
+    )
+
+    return buf.getvalue().encode()
+
+
+@food_router.get("/search", response_model=SearchFoodsResp)
+async def search_foods(
+    request: Request,
+    q: str = Query(min_length=1),
+    limit: int = Query(default=DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    after: str | None = None,
+):
+    """
+    Full-text search over name, description and review, best match first.
+    `q` takes web search syntax: `"exact phrase"`, `or`, and `-excluded`.
+    """
+    try:
+        if after is None:
+            where = ""
+            params = [q, limit + 1]
+        else:
+            after_rank, after_id = decode_cursor(after)
+            # ts_rank returns real, so compare the cursor at the same precision.
+            where = "AND (ts_rank(search, query), id) < (%s::real, %s)"
+            params = [q, after_rank, after_id, limit + 1]
+
+        async with (
+            read_pool_for(request).connection() as conn,
+            conn.cursor(row_factory=SEARCH_ROW) as cur,
+        ):
+            query = f"""
+                SELECT {FOOD_COLUMNS}, ts_rank(search, query) AS rank
+                FROM foods, websearch_to_tsquery('simple', %s) AS query
+                WHERE search @@ query {where}
+                ORDER BY rank DESC, id DESC
+                LIMIT %s;
+            """
+            await cur.execute(query, params, prepare=True)
+            foods = await cur.fetchall()
+
+        foods, next_cursor = split_page(foods, limit, "rank", "id")
+
+        return TimedJSONResponse(
             content={
                 "count": len(foods),
                 "data": foods,
+                "next_cursor": next_cursor,
             },
             status_code=status.HTTP_200_OK,
         )
@@ -44,21 +342,154 @@ def get_all_foods():
         )
 
 
-@food_router.get("/{id}", response_model=Food)
-def get_by_id(id: str):
+@food_router.post("/batch-get", response_model=BatchFoodsResp)
+async def batch_get_foods(req: BatchGetReq, request: Request):
+    """Foods in the order of `ids`, and the ids that don't exist."""
     try:
-        with (
-            pool.connection() as conn,
+        ids = unique_ids(req.ids)
+        async with (
+            read_pool_for(request).connection() as conn,
+            conn.cursor(row_factory=FOOD_ROW) as cur,
+        ):
+            query = f"""
+                SELECT {FOOD_COLUMNS} FROM foods WHERE id = ANY(%s);
+            """
+            await cur.execute(query, [ids], prepare=True)
+            foods = await cur.fetchall()
+
+        foods, missing = order_by_ids(foods, ids)
+
+        return TimedJSONResponse(
+            content={"data": foods, "missing": missing},
+            status_code=status.HTTP_200_OK,
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+
+
+@food_router.get("/{id}", response_model=ExpandedFood)
+async def get_by_id(id: str, request: Request, expand: str | None = None):
+    """`?expand=owner,location` embeds the related entities, joined in one query."""
+    if expand is not None:
+        return await _get_expanded(id, request, expand)
+
+    cached = None if pinned_to_primary(request) else food_cache.get(id)
+    if cached is not None:
+        content, etag, last_modified = cached
+        if is_not_modified(request, etag, last_modified):
+            return not_modified(etag, last_modified)
+
+        return Response(
+            content=content,
+            media_type="application/json",
+            status_code=status.HTTP_200_OK,
+            headers=validator_headers(etag, last_modified),
+        )
+
+    try:
+        # Concurrent misses for the same food share one query, unless pinned
+        # to the primary: the load in flight may be reading a lagging replica.
+        if pinned_to_primary(request):
+            content, etag, last_modified = await _load_food(request, id)
+        else:
+            content, etag, last_modified = await food_flight.do(
+                id, lambda: _load_food(request, id)
+            )
+        if etag is None:
+            return Response(
+                content=content,
+                media_type="application/json",
+                status_code=status.HTTP_200_OK,
+            )
+
+        # A conditional miss loads the whole row, not just its validators, so
+        # it takes one query and fills the cache for the next one.
+        if is_not_modified(request, etag, last_modified):
+            return not_modified(etag, last_modified)
+
+        return Response(
+            content=content,
+            media_type="application/json",
+            status_code=status.HTTP_200_OK,
+            headers=validator_headers(etag, last_modified),
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+
+
+async def _load_food(
+    request: Request, id: str
+) -> tuple[bytes, str | None, datetime | None]:
+    """The serialized food and its validators, None if it doesn't exist."""
+    generation = food_cache.generation(id)
+    async with (
+        read_pool_for(request).connection() as conn,
+        conn.cursor(row_factory=FOOD_ROW) as cur,
+    ):
+        query = f"""
+            SELECT {FOOD_COLUMNS} FROM foods WHERE id = %s;
+        """
+        await cur.execute(query, [id], prepare=True)
+        food = await cur.fetchone()
+
+    with timed("serialize"):
+        content = orjson.dumps(food)
+    if food is None:
+        return content, None, None
+
+    last_modified = modified_at(food)
+    etag = make_etag(id, last_modified)
+    food_cache.set(
+        id,
+        (content, etag, last_modified),
+        generation=generation,
+        settle=cache_settle_seconds(request),
+    )
+
+    return content, etag, last_modified
+
+
+async def _get_expanded(id: str, request: Request, expand: str) -> Response:
+    try:
+        expand = _parse_expand(expand)
+        async with (
+            read_pool_for(request).connection() as conn,
             conn.cursor(row_factory=dict_row) as cur,
         ):
-            query = """
-                SELECT * FROM foods WHERE id = %s;
+            columns, joins = _expand_query(expand)
+            query = f"""
+                SELECT {columns} FROM foods {joins} WHERE foods.id = %s;
             """
-            food = cur.execute(query, [id], prepare=True).fetchone()
+            await cur.execute(query, [id], prepare=True)
+            food = await cur.fetchone()
 
-        return ORJSONResponse(
-            content=food,
+        if food is None:
+            return Response(
+                content=orjson.dumps(None),
+                media_type="application/json",
+                status_code=status.HTTP_200_OK,
+            )
+
+        related_modified = _nest(food, expand)
+        last_modified = max(modified_at(food), *related_modified)
+        etag = make_etag(id, *expand, modified_at(food), *related_modified)
+        if is_not_modified(request, etag, last_modified):
+            return not_modified(etag, last_modified)
+
+        with timed("serialize"):
+            content = orjson.dumps(food)
+
+        return Response(
+            content=content,
+            media_type="application/json",
             status_code=status.HTTP_200_OK,
+            headers=validator_headers(etag, last_modified),
         )
     except Exception as e:
         raise HTTPException(
@@ -68,15 +499,16 @@ def get_by_id(id: str):
 
 
 @food_router.post("/", response_model=Food)
-def add_new_food(id: str, req: AddFoodReq, payload=Depends(verify_token)):
+async def add_new_food(id: str, req: AddFoodReq, payload=Depends(verify_token)):
     try:
-        with (
+        async with (
             pool.connection() as conn,
             conn.transaction(),
             conn.cursor(row_factory=dict_row) as cur,
         ):
             query = """
-                INSERT INTO foods
+                INSERT INTO foods (id, user_id, owner_id, location_id, image, name,
+                                   description, price, review)
                 VALUES(%s, %s, %s, %s, %s, %s, %s, %s, %s)
                 RETURNING id, image, name, description, price, review;
             """
@@ -91,10 +523,11 @@ def add_new_food(id: str, req: AddFoodReq, payload=Depends(verify_token)):
                 req.price,
                 req.review,
             ]
-            food = cur.execute(query, params, prepare=True).fetchone()
+            await cur.execute(query, params, prepare=True)
+            food = await cur.fetchone()
 
-        return ORJSONResponse(
-            content=jsonable_encoder(food),
+        return TimedJSONResponse(
+            content=food,
             status_code=status.HTTP_200_OK,
         )
     except Exception as e:
@@ -104,35 +537,193 @@ def add_new_food(id: str, req: AddFoodReq, payload=Depends(verify_token)):
         )
 
 
-@food_router.patch("/{id}", response_model=UpdateFoodResp)
-def update_by_id(id: str, req: UpdateFoodReq):
+@food_router.post("/bulk", response_model=BulkAddFoodResp)
+async def bulk_add_foods(request: Request, payload=Depends(verify_token)):
+    """
+    Load an NDJSON stream (`Content-Type: application/x-ndjson`) or a JSON array
+    of AddFoodReq records with a single COPY. NDJSON is validated line by line
+    as it arrives; a JSON array is read and parsed whole before the first row
+    is validated, so send large loads as NDJSON.
+
+    Records that fail validation, or whose owner_id or location_id doesn't
+    exist, are reported by their position and skipped, the rest are committed
+    together. `failed` counts every skipped record, `errors` describes at most
+    BULK_MAX_ERRORS of them.
+    """
+    errors = []
+    failed = 0
+    ids = monotonic_ulids()
     try:
-        with (
+        async with (
             pool.connection() as conn,
             conn.transaction(),
-            conn.cursor(row_factory=dict_row) as cur,
+            conn.cursor() as cur,
         ):
-            cols = []
-            params = []
-            for col, val in req.model_dump().items():
-                if val is not None:
-                    cols.append(f"{col} = %s")
-                    params.append(val)
-            params.append(id)
+            # Staged first so one dangling owner_id or location_id skips its
+            # row instead of failing the COPY of all of them.
+            await cur.execute(
+                """
+                CREATE TEMP TABLE foods_bulk (
+                    index integer NOT NULL,
+                    id varchar(26) NOT NULL,
+                    owner_id text NOT NULL,
+                    location_id text NOT NULL,
+                    image text,
+                    name text NOT NULL,
+                    description text NOT NULL,
+                    price integer NOT NULL,
+                    review text NOT NULL
+                ) ON COMMIT DROP
+                """
+            )
+            query = """
+                COPY foods_bulk (index, id, owner_id, location_id, image, name,
+                                 description, price, review)
+                FROM STDIN
+            """
+            async with cur.copy(query) as copy:
+                async for index, record in _bulk_records(request):
+                    try:
+                        if isinstance(record, bytes):
+                            req = AddFoodReq.model_validate_json(record)
+                        else:
+                            req = AddFoodReq.model_validate(record)
+                    except ValidationError as e:
+                        failed += 1
+                        if len(errors) < BULK_MAX_ERRORS:
+                            errors.append(
+                                {
+                                    "index": index,
+                                    "errors": e.errors(
+                                        include_url=False, include_context=False
+                                    ),
+                                }
+                            )
+                        continue
 
-            query = f"""
-                UPDATE foods
-                SET {", ".join(cols)}
-                WHERE id = %s
-                RETURNING *
+                    await copy.write_row(
+                        (
+                            index,
+                            next(ids),
+                            req.owner_id,
+                            req.location_id,
+                            req.image,
+                            req.name,
+                            req.description,
+                            req.price,
+                            req.review,
+                        )
+                    )
+
+            query = """
+                INSERT INTO foods (id, user_id, owner_id, location_id, image, name,
+                                   description, price, review)
+                SELECT b.id, %s, b.owner_id, b.location_id, b.image, b.name,
+                       b.description, b.price, b.review
+                FROM foods_bulk b
+                JOIN owners o ON o.id = b.owner_id
+                JOIN locations l ON l.id = b.location_id
+                ORDER BY b.id;
             """
+            await cur.execute(query, [payload["id"]])
+            inserted = cur.rowcount
+
+            query = """
+                SELECT b.index, b.owner_id, b.location_id,
+                       o.id IS NULL AS missing_owner, l.id IS NULL AS missing_location,
+                       count(*) OVER () AS orphans
+                FROM foods_bulk b
+                LEFT JOIN owners o ON o.id = b.owner_id
+                LEFT JOIN locations l ON l.id = b.location_id
+                WHERE o.id IS NULL OR l.id IS NULL
+                ORDER BY b.index
+                LIMIT %s;
+            """
+            await cur.execute(query, [max(BULK_MAX_ERRORS - len(errors), 1)])
+            orphans = await cur.fetchall()
+
+        if orphans:
+            failed += orphans[0][-1]
+        for index, owner_id, location_id, missing_owner, missing_location, _ in orphans:
+            if len(errors) == BULK_MAX_ERRORS:
+                break
+            missing = []
+            if missing_owner:
+                missing.append(("owner_id", owner_id, "owner"))
+            if missing_location:
+                missing.append(("location_id", location_id, "location"))
+            errors.append(
+                {
+                    "index": index,
+                    "errors": [
+                        {
+                            "type": "not_found",
+                            "loc": [field],
+                            "msg": f"{name} not found",
+                            "input": value,
+                        }
+                        for field, value, name in missing
+                    ],
+                }
+            )
+
+        # Validation errors come as the records arrive, the rest after the
+        # COPY, so put them back in request order.
+        errors.sort(key=lambda error: error["index"])
+
+        return TimedJSONResponse(
+            content=jsonable_encoder(
+                {"inserted": inserted, "failed": failed, "errors": errors}
+            ),
+            status_code=status.HTTP_200_OK,
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
 
-            food = cur.execute(query, params, prepare=True).fetchone()
 
-        return ORJSONResponse(
+async def _bulk_records(request: Request):
+    if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+        # Validate line by line as the body arrives instead of buffering it.
+        index = 0
+        pending = b""
+        async for chunk in request.stream():
+            *lines, pending = (pending + chunk).split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield index, line
+                    index += 1
+        if pending.strip():
+            yield index, pending
+    else:
+        # orjson has no incremental parser, so an array is buffered in full.
+        records = orjson.loads(await request.body())
+        if not isinstance(records, list):
+            raise ValueError("expected a JSON array of foods")
+        for index, record in enumerate(records):
+            yield index, record
+
+
+@food_router.patch("/{id}", response_model=UpdateFoodResp)
+async def update_by_id(id: str, req: UpdateFoodReq):
+    try:
+        async with (
+            pool.connection() as conn,
+            conn.transaction(),
+            conn.cursor(row_factory=FOOD_ROW) as cur,
+        ):
+            await food_update.execute(cur, id, req)
+            food = await cur.fetchone()
+
+        food_cache.invalidate(id)
+        food_flight.forget(id)
+
+        return TimedJSONResponse(
             content={
                 "message": "food is updated",
-                "data": jsonable_encoder(food),
+                "data": food,
             },
             status_code=status.HTTP_200_OK,
         )
@@ -144,20 +735,24 @@ def update_by_id(id: str, req: UpdateFoodReq):
 
 
 @food_router.delete("/{id}", response_model=DeleteFoodResp)
-def delete_by_id(id: str):
+async def delete_by_id(id: str):
     try:
-        with (
+        async with (
             pool.connection() as conn,
-            pool.transaction(),
+            conn.transaction(),
             conn.cursor(row_factory=dict_row) as cur,
         ):
             query = """
                 DELETE FROM foods WHERE id = %s
                 RETURNING id, image, name, description, price, review;
             """
-            food = cur.execute(query, [id], prepare=True).fetchone()
+            await cur.execute(query, [id], prepare=True)
+            food = await cur.fetchone()
+
+        food_cache.invalidate(id)
+        food_flight.forget(id)
 
-        return ORJSONResponse(
+        return TimedJSONResponse(
             content={
                 "message": f"food with id={id} is deleted",
                 "data": food,
@@ -1,7 +1,17 @@
+from datetime import datetime
+
 from pydantic import BaseModel, Field
 
+from api.location.schema import Location
+from api.owner.schema import Owner
+
 
 class Food(BaseModel):
+    id: str = Field(
+        strict=True,
+        min_length=1,
+        json_schema_extra={"format": "string"},
+    )
     user_id: str = Field(
         strict=True,
         min_length=1,
@@ -51,6 +61,26 @@ class Food(BaseModel):
         min_length=1,
         json_schema_extra={"format": "string"},
     )
+    created_at: datetime = Field(json_schema_extra={"format": "date-time"})
+    updated_at: datetime | None = Field(json_schema_extra={"format": "date-time"})
+
+
+class ExpandedFood(Food):
+    owner: Owner | None = None
+    location: Location | None = None
+
+
+class IncludedFoodRelations(BaseModel):
+    owners: list[Owner] | None = None
+    locations: list[Location] | None = None
+
+
+class BatchFoodsResp(BaseModel):
+    data: list[Food]
+    missing: list[str] = Field(
+        strict=True,
+        json_schema_extra={"format": "array"},
+    )
 
 
 class AllFoodsResp(BaseModel):
@@ -61,6 +91,12 @@ class AllFoodsResp(BaseModel):
         },
     )
     data: list[Food]
+    next_cursor: str | None = Field(
+        default=None,
+        strict=True,
+        json_schema_extra={"format": "string"},
+    )
+    included: IncludedFoodRelations | None = None
 
 
 class AddFoodReq(BaseModel):
@@ -119,6 +155,26 @@ class AddFoodResp(BaseModel):
     data: Food
 
 
+class BulkRowError(BaseModel):
+    index: int = Field(
+        strict=True,
+        json_schema_extra={"format": "int"},
+    )
+    errors: list[dict]
+
+
+class BulkAddFoodResp(BaseModel):
+    inserted: int = Field(
+        strict=True,
+        json_schema_extra={"format": "int"},
+    )
+    failed: int = Field(
+        strict=True,
+        json_schema_extra={"format": "int"},
+    )
+    errors: list[BulkRowError]
+
+
 class UpdateFoodReq(BaseModel):
     user_id: str | None = Field(
         default=None,
@@ -196,3 +252,25 @@ class DeleteFoodResp(BaseModel):
         json_schema_extra={"format": "string"},
     )
     data: Food
+
+
+class FoodSearchHit(Food):
+    rank: float = Field(
+        strict=True,
+        json_schema_extra={"format": "float"},
+    )
+
+
+class SearchFoodsResp(BaseModel):
+    count: int = Field(
+        strict=True,
+        json_schema_extra={
+            "format": "int",
+        },
+    )
+    data: list[FoodSearchHit]
+    next_cursor: str | None = Field(
+        default=None,
+        strict=True,
+        json_schema_extra={"format": "string"},
+    )
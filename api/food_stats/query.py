@@ -0,0 +1,70 @@
+from typing import Final
+
+from fastapi import Request
+from psycopg.rows import dict_row
+
+from api.replica import pinned_to_primary, read_pool_for
+from api.singleflight import register_flight
+
+# parent table -> (summary table, foods column it's grouped by), see the
+# food stats migration for how the triggers keep them current.
+FOOD_STATS: Final = {
+    "owners": ("owner_food_stats", "owner_id"),
+    "locations": ("location_food_stats", "location_id"),
+}
+
+
+def _stats_query(parent: str) -> str:
+    table, key = FOOD_STATS[parent]
+
+    return f"""
+        SELECT coalesce(stats.food_count, 0) AS food_count, stats.min_price,
+               round(stats.price_sum::numeric / stats.food_count, 2)::float8
+                   AS avg_price,
+               stats.max_price, latest.id, latest.name, latest.price,
+               latest.created_at
+        FROM {parent} AS parent
+        LEFT JOIN {table} AS stats ON stats.{key} = parent.id
+        LEFT JOIN foods AS latest ON latest.id = stats.latest_food_id
+        WHERE parent.id = %s;
+    """
+
+
+STATS_QUERIES: Final = {parent: _stats_query(parent) for parent in FOOD_STATS}
+
+# Nothing caches stats, so a write doesn't forget these: a read may still join
+# a query that started just before it, as it could have arrived just before.
+STATS_FLIGHTS: Final = {
+    parent: register_flight(table) for parent, (table, _) in FOOD_STATS.items()
+}
+
+
+async def read_food_stats(request: Request, parent: str, id: str) -> dict | None:
+    """
+    The food stats of one owner or location, or None if it doesn't exist. Three
+    primary key lookups, however many foods it has, shared by concurrent reads
+    of the same one. Don't mutate the result.
+    """
+    if pinned_to_primary(request):
+        return await _load_food_stats(request, parent, id)
+
+    return await STATS_FLIGHTS[parent].do(
+        id, lambda: _load_food_stats(request, parent, id)
+    )
+
+
+async def _load_food_stats(request: Request, parent: str, id: str) -> dict | None:
+    async with (
+        read_pool_for(request).connection() as conn,
+        conn.cursor(row_factory=dict_row) as cur,
+    ):
+        await cur.execute(STATS_QUERIES[parent], [id], prepare=True)
+        row = await cur.fetchone()
+
+    if row is None:
+        return None
+
+    latest = {col: row.pop(col) for col in ("id", "name", "price", "created_at")}
+    row["latest_food"] = latest if latest["id"] is not None else None
+
+    return row
@@ -0,0 +1,18 @@
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+
+class LatestFood(BaseModel):
+    id: str = Field(strict=True, json_schema_extra={"format": "string"})
+    name: str = Field(strict=True, json_schema_extra={"format": "string"})
+    price: int = Field(strict=True, json_schema_extra={"format": "int"})
+    created_at: datetime = Field(json_schema_extra={"format": "date-time"})
+
+
+class FoodStats(BaseModel):
+    food_count: int = Field(strict=True, json_schema_extra={"format": "int"})
+    min_price: int | None = Field(strict=True, json_schema_extra={"format": "int"})
+    avg_price: float | None = Field(strict=True, json_schema_extra={"format": "float"})
+    max_price: int | None = Field(strict=True, json_schema_extra={"format": "int"})
+    latest_food: LatestFood | None = None
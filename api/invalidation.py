@@ -0,0 +1,61 @@
+import asyncio
+import os
+from typing import Final
+
+import psycopg
+from loguru import logger
+
+from api.cache import caches
+from api.singleflight import flights
+from db import DB_CONNINFO
+
+CHANNEL: Final = "entity_changes"
+HEALTHCHECK_SECONDS: Final = float(os.getenv("INVALIDATION_HEALTHCHECK_SECONDS", "30"))
+RECONNECT_SECONDS: Final = float(os.getenv("INVALIDATION_RECONNECT_SECONDS", "1"))
+
+
+def flush_all() -> None:
+    for cache in caches.values():
+        cache.clear()
+    for flight in flights.values():
+        flight.clear()
+
+
+async def listen_for_invalidations() -> None:
+    """
+    Evict cache entries, and forget loads in flight, for the `table:id`
+    payloads the notify_entity_change trigger sends on every UPDATE or DELETE,
+    so workers never serve rows another worker changed.
+
+    Notifications sent while this worker isn't listening are lost, so every
+    (re)connect flushes all caches before trusting the channel again.
+    """
+    while True:
+        try:
+            async with await psycopg.AsyncConnection.connect(
+                DB_CONNINFO, autocommit=True
+            ) as conn:
+                await conn.execute(f"LISTEN {CHANNEL}")
+                flush_all()
+                logger.info("listening for cache invalidations on {}", CHANNEL)
+
+                while True:
+                    async for notify in conn.notifies(timeout=HEALTHCHECK_SECONDS):
+                        table, _, id = notify.payload.partition(":")
+                        cache = caches.get(table)
+                        if cache is not None:
+                            cache.invalidate(id)
+                        flight = flights.get(table)
+                        if flight is not None:
+                            flight.forget(id)
+
+                    # A quiet channel and a dead socket look the same from
+                    # notifies(), so probe the connection between timeouts.
+                    await conn.execute("SELECT 1")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            flush_all()
+            logger.warning("cache invalidation listener disconnected: {}", e)
+
+        await asyncio.sleep(RECONNECT_SECONDS)
@@ -1,73 +1,329 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.encoders import jsonable_encoder
-from fastapi.responses import ORJSONResponse
-from loguru import logger
+from datetime import datetime
+from typing import Final
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import Response
 from psycopg.rows import dict_row
 from ulid import ULID
 
 from api.auth_middleware import verify_token
+from api.batch import BatchGetReq, order_by_ids, unique_ids
+from api.cache import register_cache
+from api.conditional import (
+    is_conditional,
+    is_not_modified,
+    make_etag,
+    not_modified,
+    page_etag,
+    rows_validators,
+    validator_headers,
+)
+from api.food_stats.query import read_food_stats
+from api.food_stats.schema import FoodStats
 from api.location.schema import (
     AddLocationReq,
     AddLocationResp,
+    AllLocationsResp,
+    BatchLocationsResp,
     Location,
+    LocationHierarchyResp,
+    SearchLocationsResp,
     UpdateLocationReq,
     UpdateLocationResp,
 )
+from api.pagination import DEFAULT_LIMIT, MAX_LIMIT, decode_cursor, split_page
+from api.replica import cache_settle_seconds, pinned_to_primary, read_pool_for
+from api.rows import LocationRow, RowLayout
+from api.singleflight import register_flight
+from api.timing import TimedJSONResponse, timed
+from api.updates import register_update
 from db import pool
 
 location_router = APIRouter(
     prefix="/locations", tags=["locations"], dependencies=[Depends(verify_token)]
 )
 
+location_cache = register_cache("locations")
+location_flight = register_flight("locations")
+
+LOCATION_ROW: Final = RowLayout(Location, LocationRow)
+LOCATION_COLUMNS: Final = LOCATION_ROW.select
+
+location_update = register_update(
+    "locations", UpdateLocationReq, returning=LOCATION_COLUMNS
+)
+
 
-@location_router.get("/", response_model=list[Location])
-def get_all_locations():
+@location_router.get("/", response_model=AllLocationsResp)
+async def get_all_locations(
+    request: Request,
+    limit: int = Query(default=DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    after: str | None = None,
+):
     try:
-        with (
-            pool.connection() as conn,
-            conn.cursor(row_factory=dict_row) as cur,
+        if after is None:
+            where = ""
+            params = [limit + 1]
+        else:
+            (after_id,) = decode_cursor(after)
+            where = "WHERE id > %s"
+            params = [after_id, limit + 1]
+
+        async with (
+            read_pool_for(request).connection() as conn,
+            conn.cursor(row_factory=LOCATION_ROW) as cur,
         ):
-            query = "SELECT * FROM locations;"
-            locations = cur.execute(query, prepare=True).fetchall()
+            if is_conditional(request):
+                query = f"""
+                    SELECT count(*) AS count, max(modified_at) AS last_modified,
+                           min(id) AS first_id, max(id) AS last_id
+                    FROM (
+                        SELECT id, coalesce(updated_at, created_at) AS modified_at
+                        FROM locations {where} ORDER BY id LIMIT %s
+                    ) AS page;
+                """
+                async with conn.cursor(row_factory=dict_row) as validators:
+                    await validators.execute(query, params, prepare=True)
+                    page = await validators.fetchone()
+                etag = page_etag(**page)
+                if is_not_modified(request, etag, page["last_modified"]):
+                    return not_modified(etag, page["last_modified"])
+
+            query = f"""
+                SELECT {LOCATION_COLUMNS} FROM locations {where} ORDER BY id LIMIT %s;
+            """
+            await cur.execute(query, params, prepare=True)
+            locations = await cur.fetchall()
 
-        if locations == []:
-            return []
+        etag, last_modified = rows_validators(locations)
+        locations, next_cursor = split_page(locations, limit, "id")
 
-        return locations
+        return TimedJSONResponse(
+            content={
+                "count": len(locations),
+                "data": locations,
+                "next_cursor": next_cursor,
+            },
+            status_code=status.HTTP_200_OK,
+            headers=validator_headers(etag, last_modified),
+        )
     except Exception as e:
-        raise HTTPException(status_code=status.HTTP_200_OK, detail=str(e))
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
-@location_router.get("/{id}", response_model=Location | None)
-def get_by_id(id: str):
+@location_router.get("/search", response_model=SearchLocationsResp)
+async def search_locations(
+    request: Request,
+    q: str = Query(min_length=1),
+    limit: int = Query(default=DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+):
+    """
+    Typo-tolerant lookup of districts and cities by trigram similarity, closest
+    first. Both `%` conditions are served by the pg_trgm GIN indexes.
+    """
     try:
-        with (
-            pool.connection() as conn,
+        async with (
+            read_pool_for(request).connection() as conn,
             conn.cursor(row_factory=dict_row) as cur,
         ):
-            query = "SELECT * FROM locations WHERE id = %s"
-            location = cur.execute(query, [id], prepare=True).fetchone()
+            query = """
+                SELECT id, district, city, province, postal_code, details,
+                       greatest(similarity(district, %s), similarity(city, %s))
+                           AS similarity
+                FROM locations
+                WHERE district %% %s OR city %% %s
+                ORDER BY similarity DESC, id
+                LIMIT %s;
+            """
+            await cur.execute(query, [q, q, q, q, limit], prepare=True)
+            locations = await cur.fetchall()
 
-        if location is None:
-            return None
+        return TimedJSONResponse(
+            content={"count": len(locations), "data": locations},
+            status_code=status.HTTP_200_OK,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-        return location
+
+@location_router.get("/hierarchy", response_model=LocationHierarchyResp)
+async def browse_hierarchy(
+    request: Request, province: str | None = None, city: str | None = None
+):
+    """
+    Provinces, the cities of `province`, or the districts of `province` and
+    `city`, each with its number of locations. Counts come from the
+    trigger-maintained location_provinces and location_hierarchy summaries,
+    where missing values are stored as '' and returned as null.
+    """
+    try:
+        if province is None:
+            level = "province"
+            query = """
+                SELECT NULLIF(province, '') AS name, location_count AS count
+                FROM location_provinces
+                ORDER BY province;
+            """
+            params = []
+        else:
+            if city is None:
+                level = "city"
+                where = "WHERE province = %s"
+                params = [province]
+            else:
+                level = "district"
+                where = "WHERE province = %s AND city = %s"
+                params = [province, city]
+            query = f"""
+                SELECT NULLIF({level}, '') AS name, sum(location_count)::bigint AS count
+                FROM location_hierarchy {where}
+                GROUP BY {level}
+                ORDER BY {level};
+            """
+
+        async with (
+            read_pool_for(request).connection() as conn,
+            conn.cursor(row_factory=dict_row) as cur,
+        ):
+            await cur.execute(query, params, prepare=True)
+            nodes = await cur.fetchall()
+
+        return TimedJSONResponse(
+            content={"level": level, "data": nodes},
+            status_code=status.HTTP_200_OK,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@location_router.post("/batch-get", response_model=BatchLocationsResp)
+async def batch_get_locations(req: BatchGetReq, request: Request):
+    """Locations in the order of `ids`, and the ids that don't exist."""
+    try:
+        ids = unique_ids(req.ids)
+        async with (
+            read_pool_for(request).connection() as conn,
+            conn.cursor(row_factory=LOCATION_ROW) as cur,
+        ):
+            query = f"""
+                SELECT {LOCATION_COLUMNS} FROM locations WHERE id = ANY(%s);
+            """
+            await cur.execute(query, [ids], prepare=True)
+            locations = await cur.fetchall()
+
+        locations, missing = order_by_ids(locations, ids)
+
+        return TimedJSONResponse(
+            content={"data": locations, "missing": missing},
+            status_code=status.HTTP_200_OK,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@location_router.get("/{id}", response_model=Location | None)
+async def get_by_id(id: str, request: Request):
+    cached = None if pinned_to_primary(request) else location_cache.get(id)
+    if cached is not None:
+        content, etag, last_modified = cached
+        if is_not_modified(request, etag, last_modified):
+            return not_modified(etag, last_modified)
+
+        return Response(
+            content=content,
+            media_type="application/json",
+            status_code=status.HTTP_200_OK,
+            headers=validator_headers(etag, last_modified),
+        )
+
+    try:
+        if pinned_to_primary(request):
+            content, etag, last_modified = await _load_location(request, id)
+        else:
+            content, etag, last_modified = await location_flight.do(
+                id, lambda: _load_location(request, id)
+            )
+        if etag is None:
+            return Response(
+                content=content,
+                media_type="application/json",
+                status_code=status.HTTP_200_OK,
+            )
+
+        # A conditional miss loads the whole row, not just its validators, so
+        # it takes one query and fills the cache for the next one.
+        if is_not_modified(request, etag, last_modified):
+            return not_modified(etag, last_modified)
+
+        return Response(
+            content=content,
+            media_type="application/json",
+            status_code=status.HTTP_200_OK,
+            headers=validator_headers(etag, last_modified),
+        )
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+async def _load_location(
+    request: Request, id: str
+) -> tuple[bytes, str | None, datetime | None]:
+    """The serialized location and its validators, None if it doesn't exist."""
+    generation = location_cache.generation(id)
+    async with (
+        read_pool_for(request).connection() as conn,
+        conn.cursor(row_factory=LOCATION_ROW) as cur,
+    ):
+        query = f"""
+            SELECT {LOCATION_COLUMNS} FROM locations WHERE id = %s
+        """
+        await cur.execute(query, [id], prepare=True)
+        location = await cur.fetchone()
+
+    if location is None:
+        return orjson.dumps(None), None, None
+
+    last_modified = location.modified_at
+    etag = make_etag(id, last_modified)
+    with timed("serialize"):
+        content = orjson.dumps(location)
+    location_cache.set(
+        id,
+        (content, etag, last_modified),
+        generation=generation,
+        settle=cache_settle_seconds(request),
+    )
+
+    return content, etag, last_modified
+
+
+@location_router.get("/{id}/stats", response_model=FoodStats | None)
+async def get_food_stats(id: str, request: Request):
+    """
+    Food count, price range, average price and latest food at the location,
+    read from the trigger-maintained location_food_stats rather than aggregated.
+    """
+    try:
+        stats = await read_food_stats(request, "locations", id)
+
+        return TimedJSONResponse(content=stats, status_code=status.HTTP_200_OK)
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
 @location_router.post("/", response_model=AddLocationResp)
-def add_new_location(req: AddLocationReq):
+async def add_new_location(req: AddLocationReq):
     try:
-        with (
+        async with (
             pool.connection() as conn,
             conn.transaction(),
-            conn.cursor(row_factory=dict_row) as cur,
+            conn.cursor(row_factory=LOCATION_ROW) as cur,
         ):
-            query = """
+            query = f"""
                 INSERT INTO locations
                 VALUES(%s, %s, %s, %s, %s, %s)
-                RETURNING *
+                RETURNING {LOCATION_COLUMNS}
             """
             params = [
                 str(ULID()),
@@ -77,18 +333,19 @@ def add_new_location(req: AddLocationReq):
                 req.postal_code,
                 req.details,
             ]
-            location = cur.execute(query, params, prepare=True).fetchone()
+            await cur.execute(query, params, prepare=True)
+            location = await cur.fetchone()
 
         if location == {}:
-            return ORJSONResponse(
+            return TimedJSONResponse(
                 content={"message": "", "data": []},
                 status_code=status.HTTP_201_CREATED,
             )
 
-        return ORJSONResponse(
+        return TimedJSONResponse(
             content={
                 "message": "location is created",
-                "data": jsonable_encoder(location),
+                "data": location,
             },
             status_code=status.HTTP_201_CREATED,
         )
@@ -97,36 +354,21 @@ def add_new_location(req: AddLocationReq):
 
 
 @location_router.patch("/{id}", response_model=UpdateLocationResp)
-def update_by_id(id: str, req: UpdateLocationReq):
+async def update_by_id(id: str, req: UpdateLocationReq):
     try:
-        with (
+        async with (
             pool.connection() as conn,
             conn.transaction(),
-            conn.cursor(row_factory=dict_row) as cur,
+            conn.cursor(row_factory=LOCATION_ROW) as cur,
         ):
-            cols = []
-            params = []
-            for col, val in req.model_dump().items():
-                if val is not None:
-                    cols.append(f"{col} = %s")
-                    params.append(val)
-            params.append(id)
+            await location_update.execute(cur, id, req)
+            location = await cur.fetchone()
 
-            print(cols, flush=True)
-            logger.info(cols)
-            logger.info(params)
-
-            query = f"""
-                UPDATE locations
-                SET {", ".join(cols)}
-                WHERE id = %s
-                RETURNING *
-            """
-
-            location = cur.execute(query, params, prepare=True).fetchone()
+        location_cache.invalidate(id)
+        location_flight.forget(id)
 
         if location is None:
-            return ORJSONResponse(
+            return TimedJSONResponse(
                 content={
                     "message": "not found",
                     "data": None,
@@ -134,10 +376,10 @@ def update_by_id(id: str, req: UpdateLocationReq):
                 status_code=status.HTTP_404_NOT_FOUND,
             )
 
-        return ORJSONResponse(
+        return TimedJSONResponse(
             content={
                 "message": "location is updated",
-                "data": jsonable_encoder(location),
+                "data": location,
             },
             status_code=status.HTTP_200_OK,
         )
@@ -146,9 +388,9 @@ def update_by_id(id: str, req: UpdateLocationReq):
 
 
 @location_router.delete("/{id}", response_model=Location | None)
-def delete_by_id(id: str):
+async def delete_by_id(id: str):
     try:
-        with (
+        async with (
             pool.connection() as conn,
             conn.cursor(row_factory=dict_row) as cur,
         ):
@@ -156,7 +398,11 @@ def delete_by_id(id: str):
                 DELETE FROM locations WHERE id = %s
                 RETURNING *;
             """
-            location = cur.execute(query, [id], prepare=True).fetchone()
+            await cur.execute(query, [id], prepare=True)
+            location = await cur.fetchone()
+
+        location_cache.invalidate(id)
+        location_flight.forget(id)
 
         if location is None:
             return None
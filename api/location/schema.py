@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import BaseModel, Field
 
 
@@ -74,6 +76,63 @@ class Location(BaseModel):
     )
 
 
+class BatchLocationsResp(BaseModel):
+    data: list[Location]
+    missing: list[str] = Field(
+        strict=True,
+        json_schema_extra={"format": "array"},
+    )
+
+
+class AllLocationsResp(BaseModel):
+    count: int = Field(
+        strict=True,
+        json_schema_extra={
+            "format": "int",
+        },
+    )
+    data: list[Location]
+    next_cursor: str | None = Field(
+        default=None,
+        strict=True,
+        json_schema_extra={"format": "string"},
+    )
+
+
+class LocationSearchHit(Location):
+    similarity: float = Field(
+        strict=True,
+        json_schema_extra={"format": "float"},
+    )
+
+
+class SearchLocationsResp(BaseModel):
+    count: int = Field(
+        strict=True,
+        json_schema_extra={
+            "format": "int",
+        },
+    )
+    data: list[LocationSearchHit]
+
+
+class HierarchyNode(BaseModel):
+    name: str | None = Field(
+        default=None,
+        strict=True,
+        json_schema_extra={"format": "string"},
+    )
+    count: int = Field(
+        strict=True,
+        json_schema_extra={"format": "int"},
+    )
+
+
+class LocationHierarchyResp(BaseModel):
+    level: Literal["province", "city", "district"]
+    data: list[HierarchyNode]
+
+
 class AddLocationResp(BaseModel):
     message: str = Field(
         strict=True,
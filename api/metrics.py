@@ -0,0 +1,206 @@
+import time
+from bisect import bisect_left
+from collections.abc import Iterator
+from typing import Final
+
+from psycopg import AsyncConnection
+from psycopg_pool import AsyncConnectionPool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from api.timing import record
+
+# Upper bounds, in seconds, of the histogram buckets.
+POOL_WAIT_BUCKETS: Final = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5,
+)  # fmt: skip
+CHECKOUT_BUCKETS: Final = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)  # fmt: skip
+REQUEST_BUCKETS: Final = (
+    0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)  # fmt: skip
+
+CONTENT_TYPE: Final = "text/plain; version=0.0.4; charset=utf-8"
+
+# get_stats() keys that are point-in-time measures; every other key is a
+# counter that only grows.
+POOL_GAUGES: Final = {
+    "pool_min",
+    "pool_max",
+    "pool_size",
+    "pool_available",
+    "requests_waiting",
+}
+
+
+class Histogram:
+    """
+    Prometheus histogram with one series per label tuple.
+
+    Observing is a bisect and two additions on plain ints and floats, without
+    locks: like the caches it is only touched from the event loop. Each worker
+    process keeps its own series, so Prometheus scrapes every worker.
+    """
+
+    def __init__(
+        self, name: str, help: str, buckets: tuple[float, ...], labels: tuple[str, ...]
+    ):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.labels = labels
+        # Per label tuple: a count per bucket plus +Inf, then the sum.
+        self._series: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = ([0] * (len(self.buckets) + 1), [0.0])
+        counts, total = series
+        counts[bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def totals(self, *label_values: str) -> tuple[int, float]:
+        """The count and sum observed so far for one label tuple."""
+        series = self._series.get(label_values)
+        if series is None:
+            return 0, 0.0
+        counts, total = series
+
+        return sum(counts), total[0]
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for label_values, (counts, total) in self._series.items():
+            labels = ",".join(
+                f'{label}="{escape(value)}"'
+                for label, value in zip(self.labels, label_values, strict=True)
+            )
+            sep = "," if labels else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts, strict=False):
+                cumulative += count
+                yield f'{self.name}_bucket{{{labels}{sep}le="{bound}"}} {cumulative}'
+            cumulative += counts[-1]
+            yield f'{self.name}_bucket{{{labels}{sep}le="+Inf"}} {cumulative}'
+            yield f"{self.name}_sum{{{labels}}} {total[0]}"
+            yield f"{self.name}_count{{{labels}}} {cumulative}"
+
+
+def escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+pool_wait_seconds = Histogram(
+    "kumande_pool_wait_seconds",
+    "Time spent waiting for a pool connection.",
+    POOL_WAIT_BUCKETS,
+    ("pool",),
+)
+pool_checkout_seconds = Histogram(
+    "kumande_pool_checkout_seconds",
+    "Time a connection is held between getconn and putconn.",
+    CHECKOUT_BUCKETS,
+    ("pool",),
+)
+request_seconds = Histogram(
+    "kumande_http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    REQUEST_BUCKETS,
+    ("method", "route", "status"),
+)
+
+# Every instrumented pool, by name, for the pool gauges and counters.
+pools: dict[str, AsyncConnectionPool] = {}
+
+
+class InstrumentedPool(AsyncConnectionPool):
+    """
+    AsyncConnectionPool that times how long getconn waits and how long each
+    connection stays checked out. `connection()` goes through getconn and
+    putconn, so every `pool.connection()` block is measured.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._checked_out: dict[int, float] = {}
+        pools[self.name] = self
+
+    async def getconn(self, timeout: float | None = None) -> AsyncConnection:
+        start = time.perf_counter()
+        try:
+            conn = await super().getconn(timeout)
+        finally:
+            got_at = time.perf_counter()
+            pool_wait_seconds.observe(got_at - start, self.name)
+            record("pool", got_at - start)
+        self._checked_out[id(conn)] = got_at
+
+        return conn
+
+    async def putconn(self, conn: AsyncConnection) -> None:
+        got_at = self._checked_out.pop(id(conn), None)
+        if got_at is not None:
+            pool_checkout_seconds.observe(time.perf_counter() - got_at, self.name)
+        await super().putconn(conn)
+
+
+def render_pool_stats() -> Iterator[str]:
+    stats = {name: pool.get_stats() for name, pool in pools.items()}
+    keys = sorted({key for pool_stats in stats.values() for key in pool_stats})
+    for key in keys:
+        if key in POOL_GAUGES:
+            name, kind = f"kumande_pool_{key.removeprefix('pool_')}", "gauge"
+        else:
+            name, kind = f"kumande_pool_{key}_total", "counter"
+        yield f"# HELP {name} psycopg_pool get_stats() {key}."
+        yield f"# TYPE {name} {kind}"
+        for pool_name, pool_stats in stats.items():
+            yield f'{name}{{pool="{escape(pool_name)}"}} {pool_stats.get(key, 0)}'
+
+
+def render() -> str:
+    lines = [
+        *render_pool_stats(),
+        *pool_wait_seconds.render(),
+        *pool_checkout_seconds.render(),
+        *request_seconds.render(),
+    ]
+
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    Time every HTTP request into `request_seconds`, labelled by the matched
+    route template rather than the raw path, so ids don't explode the series.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            request_seconds.observe(
+                time.perf_counter() - start,
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status),
+            )
@@ -1,11 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.encoders import jsonable_encoder
-from fastapi.responses import ORJSONResponse
+from datetime import datetime
+from typing import Final
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import Response
 from psycopg.rows import dict_row
 from ulid import ULID
 
 from api.auth_middleware import verify_token
-from api.owner.schema import AddOwnerReq, AddOwnerResp, AllOwnersResp
+from api.batch import BatchGetReq, order_by_ids, unique_ids
+from api.cache import register_cache
+from api.conditional import (
+    is_conditional,
+    is_not_modified,
+    make_etag,
+    not_modified,
+    page_etag,
+    rows_validators,
+    validator_headers,
+)
+from api.food_stats.query import read_food_stats
+from api.owner.schema import (
+    AddOwnerReq,
+    AddOwnerResp,
+    AllOwnersResp,
+    BatchOwnersResp,
+    Owner,
+    OwnerFoodStatsResp,
+)
+from api.pagination import DEFAULT_LIMIT, MAX_LIMIT, decode_cursor, split_page
+from api.replica import cache_settle_seconds, pinned_to_primary, read_pool_for
+from api.rows import OwnerRow, RowLayout
+from api.singleflight import register_flight
+from api.timing import TimedJSONResponse, timed
+from api.updates import register_update
 from db import pool
 
 owner_router = APIRouter(
@@ -14,29 +42,37 @@ owner_router = APIRouter(
     dependencies=[Depends(verify_token)],
 )
 
+owner_cache = register_cache("owners")
+owner_flight = register_flight("owners")
+
+OWNER_ROW: Final = RowLayout(Owner, OwnerRow)
+OWNER_COLUMNS: Final = OWNER_ROW.select
+owner_update = register_update("owners", AddOwnerReq, returning=OWNER_COLUMNS)
+
 
 @owner_router.post(
     "/",
     response_model=AddOwnerResp,
 )
-def add_new_owner(req: AddOwnerReq):
+async def add_new_owner(req: AddOwnerReq):
     try:
-        with (
+        async with (
             pool.connection() as conn,
             conn.transaction(),
-            conn.cursor(row_factory=dict_row) as cur,
+            conn.cursor(row_factory=OWNER_ROW) as cur,
         ):
-            query = """
-                INSERT INTO owners
-                VALUES(%s, %s, %s)
-                RETURNING id, image, name;
+            query = f"""
+                INSERT INTO owners (id, image, name)
+                VALUES (%s, %s, %s)
+                RETURNING {OWNER_COLUMNS};
             """
             params = [str(ULID()), req.image, req.name]
-            owner = cur.execute(query, params, prepare=True).fetchone()
+            await cur.execute(query, params, prepare=True)
+            owner = await cur.fetchone()
 
-        return ORJSONResponse(
+        return TimedJSONResponse(
             content={
-                "data": jsonable_encoder(owner),
+                "data": owner,
             },
             status_code=status.HTTP_200_OK,
         )
@@ -51,38 +87,174 @@ def add_new_owner(req: AddOwnerReq):
     "/",
     response_model=AllOwnersResp,
 )
-def get_all():
+async def get_all(
+    request: Request,
+    limit: int = Query(default=DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    after: str | None = None,
+):
     try:
-        with pool.connection() as conn, conn.cursor(row_factory=dict_row) as cur:
-            query = """
-                SELECT id, image, name FROM owners;
+        if after is None:
+            where = ""
+            params = [limit + 1]
+        else:
+            (after_id,) = decode_cursor(after)
+            where = "WHERE id > %s"
+            params = [after_id, limit + 1]
+
+        async with (
+            read_pool_for(request).connection() as conn,
+            conn.cursor(row_factory=OWNER_ROW) as cur,
+        ):
+            if is_conditional(request):
+                query = f"""
+                    SELECT count(*) AS count, max(modified_at) AS last_modified,
+                           min(id) AS first_id, max(id) AS last_id
+                    FROM (
+                        SELECT id, coalesce(updated_at, created_at) AS modified_at
+                        FROM owners {where} ORDER BY id LIMIT %s
+                    ) AS page;
+                """
+                async with conn.cursor(row_factory=dict_row) as validators:
+                    await validators.execute(query, params, prepare=True)
+                    page = await validators.fetchone()
+                etag = page_etag(**page)
+                if is_not_modified(request, etag, page["last_modified"]):
+                    return not_modified(etag, page["last_modified"])
+
+            query = f"""
+                SELECT {OWNER_COLUMNS} FROM owners {where} ORDER BY id LIMIT %s;
             """
-            owners = cur.execute(query).fetchall()
+            await cur.execute(query, params, prepare=True)
+            owners = await cur.fetchall()
+
+        etag, last_modified = rows_validators(owners)
+        owners, next_cursor = split_page(owners, limit, "id")
 
-        return ORJSONResponse(
+        return TimedJSONResponse(
             content={
                 "count": len(owners),
-                "data": jsonable_encoder(owners),
+                "data": owners,
+                "next_cursor": next_cursor,
             },
             status_code=status.HTTP_200_OK,
+            headers=validator_headers(etag, last_modified),
         )
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
-@owner_router.get("/{id}", response_model=AddOwnerResp)
-def get_by_id(id: str):
+@owner_router.post("/batch-get", response_model=BatchOwnersResp)
+async def batch_get_owners(req: BatchGetReq, request: Request):
+    """Owners in the order of `ids`, and the ids that don't exist."""
     try:
-        with pool.connection() as conn, conn.cursor(row_factory=dict_row) as cur:
-            query = """
-                SELECT id, images, name FROM owners WHERE id = %s;
+        ids = unique_ids(req.ids)
+        async with (
+            read_pool_for(request).connection() as conn,
+            conn.cursor(row_factory=OWNER_ROW) as cur,
+        ):
+            query = f"""
+                SELECT {OWNER_COLUMNS} FROM owners WHERE id = ANY(%s);
             """
-            owners = cur.execute(query, [id]).fetchall()
+            await cur.execute(query, [ids], prepare=True)
+            owners = await cur.fetchall()
 
-        return ORJSONResponse(
-            content={
-                "data": jsonable_encoder(owners),
-            },
+        owners, missing = order_by_ids(owners, ids)
+
+        return TimedJSONResponse(
+            content={"data": owners, "missing": missing},
+            status_code=status.HTTP_200_OK,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@owner_router.get("/{id}", response_model=AddOwnerResp)
+async def get_by_id(id: str, request: Request):
+    cached = None if pinned_to_primary(request) else owner_cache.get(id)
+    if cached is not None:
+        content, etag, last_modified = cached
+        if is_not_modified(request, etag, last_modified):
+            return not_modified(etag, last_modified)
+
+        return Response(
+            content=content,
+            media_type="application/json",
+            status_code=status.HTTP_200_OK,
+            headers=validator_headers(etag, last_modified),
+        )
+
+    try:
+        if pinned_to_primary(request):
+            content, etag, last_modified = await _load_owner(request, id)
+        else:
+            content, etag, last_modified = await owner_flight.do(
+                id, lambda: _load_owner(request, id)
+            )
+        if etag is None:
+            return Response(
+                content=content,
+                media_type="application/json",
+                status_code=status.HTTP_200_OK,
+            )
+
+        # A conditional miss loads the whole row, not just its validators, so
+        # it takes one query and fills the cache for the next one.
+        if is_not_modified(request, etag, last_modified):
+            return not_modified(etag, last_modified)
+
+        return Response(
+            content=content,
+            media_type="application/json",
+            status_code=status.HTTP_200_OK,
+            headers=validator_headers(etag, last_modified),
+        )
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+async def _load_owner(
+    request: Request, id: str
+) -> tuple[bytes, str | None, datetime | None]:
+    """The serialized owner and its validators, None if it doesn't exist."""
+    generation = owner_cache.generation(id)
+    async with (
+        read_pool_for(request).connection() as conn,
+        conn.cursor(row_factory=OWNER_ROW) as cur,
+    ):
+        query = f"""
+            SELECT {OWNER_COLUMNS} FROM owners WHERE id = %s;
+        """
+        await cur.execute(query, [id], prepare=True)
+        owner = await cur.fetchone()
+
+    if owner is None:
+        return orjson.dumps({"data": None}), None, None
+
+    last_modified = owner.modified_at
+    etag = make_etag(id, last_modified)
+    with timed("serialize"):
+        content = orjson.dumps({"data": owner})
+    owner_cache.set(
+        id,
+        (content, etag, last_modified),
+        generation=generation,
+        settle=cache_settle_seconds(request),
+    )
+
+    return content, etag, last_modified
+
+
+@owner_router.get("/{id}/stats", response_model=OwnerFoodStatsResp)
+async def get_food_stats(id: str, request: Request):
+    """
+    Food count, price range, average price and latest food of the owner, read
+    from the trigger-maintained owner_food_stats rather than aggregated.
+    """
+    try:
+        stats = await read_food_stats(request, "owners", id)
+
+        return TimedJSONResponse(
+            content={"data": stats},
             status_code=status.HTTP_200_OK,
         )
     except Exception as e:
@@ -90,31 +262,22 @@ def get_by_id(id: str):
 
 
 @owner_router.patch("/{id}", response_model=AddOwnerResp)
-def update_by_id(id: str, req: AddOwnerReq):
+async def update_by_id(id: str, req: AddOwnerReq):
     try:
-        with (
+        async with (
             pool.connection() as conn,
             conn.transaction(),
-            conn.cursor(row_factory=dict_row) as cur,
+            conn.cursor(row_factory=OWNER_ROW) as cur,
         ):
-            cols = []
-            params = []
-            for col, val in req.model_dump().items():
-                if val is not None:
-                    cols.append(f"{col} = %s")
-                    params.append(val)
-            params.append(id)
-            query = f"""
-                UPDATE owners
-                SET {", ".join(cols)}
-                WHERE id = %s
-                RETURNING *
-            """
-            owner = cur.execute(query, params, prepare=True).fetchone()
+            await owner_update.execute(cur, id, req)
+            owner = await cur.fetchone()
+
+        owner_cache.invalidate(id)
+        owner_flight.forget(id)
 
-        return ORJSONResponse(
+        return TimedJSONResponse(
             content={
-                "data": jsonable_encoder(owner),
+                "data": owner,
             },
             status_code=status.HTTP_200_OK,
         )
@@ -123,21 +286,22 @@ def update_by_id(id: str, req: AddOwnerReq):
 
 
 @owner_router.delete("/{id}")
-def delete_by_id(id: str):
+async def delete_by_id(id: str):
     try:
-        with (
+        async with (
             pool.connection() as conn,
-            conn.cursor(row_factory=dict_row) as cur,
+            conn.cursor(row_factory=OWNER_ROW) as cur,
         ):
-            query = """
+            query = f"""
                 DELETE FROM owners WHERE id = %s
-                RETURNING *;
+                RETURNING {OWNER_COLUMNS};
             """
-            location = cur.execute(query, [id], prepare=True).fetchone()
+            await cur.execute(query, [id], prepare=True)
+            owner = await cur.fetchone()
 
-        if location is None:
-            return None
+        owner_cache.invalidate(id)
+        owner_flight.forget(id)
 
-        return location
+        return TimedJSONResponse(content=owner, status_code=status.HTTP_200_OK)
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
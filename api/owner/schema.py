@@ -1,5 +1,7 @@
 from pydantic import BaseModel, Field
 
+from api.food_stats.schema import FoodStats
+
 
 class Owner(BaseModel):
     id: str = Field(strict=True, min_length=1, json_schema_extra={"format": "string"})
@@ -12,6 +14,14 @@ class Owner(BaseModel):
 class AllOwnersResp(BaseModel):
     count: int = Field(strict=True, json_schema_extra={"format": "int"})
     data: list[Owner]
+    next_cursor: str | None = Field(
+        default=None, strict=True, json_schema_extra={"format": "string"}
+    )
+
+
+class BatchOwnersResp(BaseModel):
+    data: list[Owner]
+    missing: list[str] = Field(strict=True, json_schema_extra={"format": "array"})
 
 
 class AddOwnerReq(BaseModel):
@@ -23,3 +33,7 @@ class AddOwnerReq(BaseModel):
 
 class AddOwnerResp(BaseModel):
     data: Owner
+
+
+class OwnerFoodStatsResp(BaseModel):
+    data: FoodStats | None
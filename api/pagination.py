@@ -0,0 +1,40 @@
+import base64
+from typing import Final
+
+import orjson
+
+DEFAULT_LIMIT: Final = 50
+MAX_LIMIT: Final = 500
+
+
+def encode_cursor(*keys) -> str:
+    """Pack the sort key of the last row on a page into an opaque cursor."""
+    return base64.urlsafe_b64encode(orjson.dumps(keys)).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    """Unpack a cursor produced by `encode_cursor`, raising ValueError if tampered."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        keys = orjson.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, orjson.JSONDecodeError) as e:
+        raise ValueError("invalid cursor") from e
+
+    if not isinstance(keys, list) or not keys:
+        raise ValueError("invalid cursor")
+
+    return keys
+
+
+def split_page(rows: list, limit: int, *keys: str) -> tuple[list, str | None]:
+    """
+    Trim the look-ahead row fetched with `LIMIT limit + 1` and build the cursor
+    for the next page from `keys` of the last row kept, or None on the last page.
+    """
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+
+    return rows, encode_cursor(*(last[key] for key in keys))
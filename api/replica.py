@@ -0,0 +1,99 @@
+import os
+import time
+from http.cookies import SimpleCookie
+from typing import Final
+
+from fastapi import Request
+from psycopg_pool import AsyncConnectionPool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from db import pool, read_pool
+
+READ_YOUR_WRITES_SECONDS: Final = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+PRIMARY_COOKIE: Final = "read_primary_until"
+# The same deadline as a header, for API clients without a cookie jar: they
+# send back the value of the last write response's header.
+PRIMARY_HEADER: Final = "read-primary-until"
+
+WRITE_METHODS: Final = {"POST", "PUT", "PATCH", "DELETE"}
+# The routers that read from the replica. Writes elsewhere, like
+# /users/register and /users/login, have nothing to read back and don't pin.
+PINNED_PREFIXES: Final = ("/foods", "/owners", "/locations")
+# POST endpoints that only read, and so don't pin the client to the primary.
+READ_ONLY_SUFFIXES: Final = ("/batch-get",)
+
+
+def pinned_to_primary(request: Request) -> bool:
+    """
+    Whether the client wrote within the last READ_YOUR_WRITES_SECONDS, so the
+    replica may not have its write yet. Such reads also skip the caches, which
+    may hold rows read from the replica.
+
+    Deadlines further out than one window are ignored, so a client can't pin
+    itself to the primary for good.
+    """
+    if read_pool is pool:
+        return False
+
+    value = request.headers.get(PRIMARY_HEADER) or request.cookies.get(PRIMARY_COOKIE)
+    try:
+        primary_until = float(value or 0)
+    except ValueError:
+        primary_until = 0
+
+    now = time.time()
+    return now < primary_until <= now + READ_YOUR_WRITES_SECONDS
+
+
+def read_pool_for(request: Request) -> AsyncConnectionPool:
+    return pool if pinned_to_primary(request) else read_pool
+
+
+def cache_settle_seconds(request: Request) -> float:
+    """
+    How long after an invalidation a row read for `request` must not fill a
+    cache. Invalidations come from the primary, so a replica read just after
+    one may still return the row from before the write.
+    """
+    return 0.0 if read_pool_for(request) is pool else READ_YOUR_WRITES_SECONDS
+
+
+class ReadYourWritesMiddleware:
+    """
+    Pin a client's reads to the primary for READ_YOUR_WRITES_SECONDS after each
+    successful write to a PINNED_PREFIXES resource, through a cookie every
+    worker can check, and the same deadline in a header for clients that send
+    it back themselves.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or read_pool is pool
+            or scope["method"] not in WRITE_METHODS
+            or not scope["path"].startswith(PINNED_PREFIXES)
+            or scope["path"].endswith(READ_ONLY_SUFFIXES)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                primary_until = str(time.time() + READ_YOUR_WRITES_SECONDS)
+                cookie = SimpleCookie()
+                cookie[PRIMARY_COOKIE] = primary_until
+                cookie[PRIMARY_COOKIE]["max-age"] = int(READ_YOUR_WRITES_SECONDS) + 1
+                cookie[PRIMARY_COOKIE]["path"] = "/"
+                cookie[PRIMARY_COOKIE]["httponly"] = True
+                cookie[PRIMARY_COOKIE]["samesite"] = "lax"
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"set-cookie", cookie.output(header="").strip().encode()),
+                    (PRIMARY_HEADER.encode(), primary_until.encode()),
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
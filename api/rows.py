@@ -0,0 +1,139 @@
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import Any, ClassVar
+
+from psycopg import AsyncCursor
+from pydantic import BaseModel
+
+
+class Row:
+    """
+    Base of the slotted row classes. Rows are read by attribute, and also as
+    `row["col"]` so the helpers written against dict_row rows keep working.
+
+    Fields starting with an underscore carry values the handlers need but the
+    response doesn't, such as the validators: orjson leaves them out. They
+    are selected from the expressions in `EXPRESSIONS`.
+    """
+
+    __slots__ = ()
+
+    EXPRESSIONS: ClassVar[dict[str, str]] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        return getattr(self, key)
+
+    @property
+    def modified_at(self) -> datetime:
+        return self.updated_at or self.created_at
+
+
+@dataclass(slots=True)
+class FoodRow(Row):
+    id: str
+    user_id: str
+    owner_id: str
+    location_id: str
+    image: str | None
+    name: str
+    description: str
+    price: int
+    review: str
+    created_at: datetime
+    updated_at: datetime | None
+
+
+@dataclass(slots=True)
+class FoodSearchRow(FoodRow):
+    rank: float
+
+
+@dataclass(slots=True)
+class LocationRow(Row):
+    EXPRESSIONS: ClassVar[dict[str, str]] = {
+        "_modified_at": "coalesce(updated_at, created_at)"
+    }
+
+    id: str
+    district: str | None
+    city: str | None
+    province: str | None
+    postal_code: str | None
+    details: str | None
+    _modified_at: datetime
+
+    @property
+    def modified_at(self) -> datetime:
+        return self._modified_at
+
+
+@dataclass(slots=True)
+class OwnerRow(Row):
+    EXPRESSIONS: ClassVar[dict[str, str]] = {
+        "_modified_at": "coalesce(updated_at, created_at)"
+    }
+
+    id: str
+    image: str | None
+    name: str
+    _modified_at: datetime
+
+    @property
+    def modified_at(self) -> datetime:
+        return self._modified_at
+
+
+@dataclass(slots=True)
+class UserRow(Row):
+    id: str
+    username: str
+    password: str
+
+
+class RowLayout:
+    """
+    psycopg row factory that builds `row_class` instances for one select list.
+
+    A slotted row holds its values without a per-row dict, and orjson
+    serializes dataclasses natively, so the rows go straight to bytes without
+    jsonable_encoder or a response_model pass. Nothing filters them on the way
+    out, so the row class's public fields must be exactly the fields of
+    `model`. Every execute checks that the query returns the row class's
+    fields in order, so rows are built positionally; `select` is the select
+    list that returns them.
+    """
+
+    def __init__(self, model: type[BaseModel], row_class: type[Row]):
+        self.row_class = row_class
+        self.columns = tuple(field.name for field in fields(row_class))
+        public = [col for col in self.columns if not col.startswith("_")]
+        missing = [field for field in model.model_fields if field not in public]
+        extra = [col for col in public if col not in model.model_fields]
+        if missing or extra:
+            raise ValueError(
+                f"{row_class.__name__} doesn't match {model.__name__}: "
+                f"missing ({', '.join(missing)}), extra ({', '.join(extra)})"
+            )
+        self.select = ", ".join(
+            f"{row_class.EXPRESSIONS[col]} AS {col}"
+            if col in row_class.EXPRESSIONS
+            else col
+            for col in self.columns
+        )
+
+        def make_row(values: Sequence[Any]) -> Row:
+            return row_class(*values)
+
+        self._make_row = make_row
+
+    def __call__(self, cursor: AsyncCursor) -> Callable[[Sequence[Any]], Row]:
+        if cursor.description is not None:
+            names = tuple(col.name for col in cursor.description)
+            if names != self.columns:
+                raise RuntimeError(
+                    f"query returns ({', '.join(names)}), "
+                    f"{self.row_class.__name__} expects ({', '.join(self.columns)})"
+                )
+
+        return self._make_row
@@ -0,0 +1,91 @@
+import asyncio
+import os
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any, Final
+
+from api.timing import timed
+
+# Comma-separated names of the flights to enable, or `*` for all of them.
+SINGLE_FLIGHT_ROUTES: Final = {
+    name.strip() for name in os.getenv("SINGLE_FLIGHT_ROUTES", "*").split(",")
+}
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent loads of the same key into one.
+
+    The first caller for a key starts the load as a task, and every caller
+    that arrives while it runs awaits that same task, so a burst of identical
+    reads checks out one connection and runs one query. Waiters are shielded:
+    a client that disconnects stops waiting without cancelling the load the
+    others share. Results aren't kept once the load finishes; that's the
+    caches' job. Like the caches it is only touched from the event loop.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.loads = 0
+        self.shared = 0
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        if not self.enabled:
+            return await load()
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.shared += 1
+            with timed("coalesced"):
+                return await asyncio.shield(task)
+
+        self.loads += 1
+        task = asyncio.ensure_future(load())
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._finish(key, done))
+
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception retrieved even if every waiter went away.
+        if not task.cancelled():
+            task.exception()
+
+    def forget(self, key: Hashable) -> None:
+        """
+        Let the next call for `key` start its own load, for after a write: a
+        load already in flight may have read the row before it changed. That
+        load still finishes for the callers waiting on it. The loaders pass
+        the cache generation they read to `set`, so its fill is dropped once
+        the write has invalidated the key.
+        """
+        self._inflight.pop(key, None)
+
+    def clear(self) -> None:
+        self._inflight.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._inflight),
+            "loads": self.loads,
+            "shared": self.shared,
+        }
+
+
+# Every flight the routers load through, by name, for stats and invalidation.
+flights: dict[str, SingleFlight] = {}
+
+
+def register_flight(name: str, enabled: bool | None = None) -> SingleFlight:
+    """
+    Register a SingleFlight under `name`, enabled if SINGLE_FLIGHT_ROUTES lists
+    it unless `enabled` says otherwise.
+    """
+    if enabled is None:
+        enabled = "*" in SINGLE_FLIGHT_ROUTES or name in SINGLE_FLIGHT_ROUTES
+    flight = flights[name] = SingleFlight(enabled)
+
+    return flight
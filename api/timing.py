@@ -0,0 +1,142 @@
+import os
+import random
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Final
+
+from fastapi.responses import ORJSONResponse
+from loguru import logger
+from psycopg import AsyncConnection, AsyncCursor
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Fraction of requests whose timings are logged, plus every request slower
+# than TIMING_LOG_SLOW_MS.
+TIMING_LOG_SAMPLE_RATE: Final = float(os.getenv("TIMING_LOG_SAMPLE_RATE", "0.01"))
+TIMING_LOG_SLOW_MS: Final = float(os.getenv("TIMING_LOG_SLOW_MS", "500"))
+
+# Seconds spent per phase in the current request, or None outside a request.
+_timings: ContextVar[dict[str, float] | None] = ContextVar("timings", default=None)
+
+
+def record(phase: str, seconds: float) -> None:
+    """Add `seconds` to `phase` of the current request, if there is one."""
+    timings = _timings.get()
+    if timings is not None:
+        timings[phase] = timings.get(phase, 0.0) + seconds
+
+
+@contextmanager
+def timed(phase: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(phase, time.perf_counter() - start)
+
+
+class TimedCursor(AsyncCursor):
+    """
+    Cursor that records `db` for executes, which covers the round trip and
+    receiving the result, and `fetch` for turning the result into rows, which
+    is where the row factory runs.
+    """
+
+    async def execute(self, *args: Any, **kwargs: Any) -> "TimedCursor":
+        with timed("db"):
+            return await super().execute(*args, **kwargs)
+
+    async def fetchone(self) -> Any:
+        with timed("fetch"):
+            return await super().fetchone()
+
+    async def fetchmany(self, size: int = 0) -> list:
+        with timed("fetch"):
+            return await super().fetchmany(size)
+
+    async def fetchall(self) -> list:
+        with timed("fetch"):
+            return await super().fetchall()
+
+
+async def use_timed_cursors(conn: AsyncConnection) -> None:
+    """Pool `configure` callback that makes `conn.cursor()` return TimedCursor."""
+    conn.cursor_factory = TimedCursor
+
+
+class TimedJSONResponse(ORJSONResponse):
+    """ORJSONResponse that records its rendering as `serialize`."""
+
+    def render(self, content: Any) -> bytes:
+        with timed("serialize"):
+            return super().render(content)
+
+
+def server_timing(timings: dict[str, float], total: float) -> str:
+    metrics = [
+        f"{phase};dur={seconds * 1000:.2f}" for phase, seconds in timings.items()
+    ]
+    metrics.append(f"total;dur={total * 1000:.2f}")
+
+    return ", ".join(metrics)
+
+
+class ServerTimingMiddleware:
+    """
+    Collect the phases each request records into a Server-Timing header, and
+    log them as a structured record for a sample of requests and every slow
+    one. Phases recorded after the response starts, such as a streamed export,
+    only show up in the log.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings: dict[str, float] = {}
+        token = _timings.set(timings)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                header = server_timing(timings, time.perf_counter() - start)
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"server-timing", header.encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _timings.reset(token)
+            total_ms = (time.perf_counter() - start) * 1000
+            if (
+                total_ms >= TIMING_LOG_SLOW_MS
+                or random.random() < TIMING_LOG_SAMPLE_RATE
+            ):
+                route = scope.get("route")
+                logger.bind(
+                    method=scope["method"],
+                    route=getattr(route, "path", "unmatched"),
+                    status=status,
+                    total_ms=round(total_ms, 2),
+                    **{
+                        f"{phase}_ms": round(seconds * 1000, 2)
+                        for phase, seconds in timings.items()
+                    },
+                ).info(
+                    "{} {} {} in {:.1f} ms",
+                    scope["method"],
+                    scope["path"],
+                    status,
+                    total_ms,
+                )
@@ -0,0 +1,41 @@
+from collections.abc import Iterator
+from typing import Final
+
+from ulid import ULID
+
+_CROCKFORD: Final = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+# Every 10-bit value as two Crockford base32 characters.
+_PAIRS: Final = [hi + lo for hi in _CROCKFORD for lo in _CROCKFORD]
+_LOW_BITS: Final = 30
+
+
+def monotonic_ulids(start: ULID | None = None) -> Iterator[str]:
+    """
+    Yield ULIDs counting up by one from `start` (a fresh ULID by default), as the
+    ULID spec does for ids minted within the same millisecond.
+
+    Only the last 6 characters are re-encoded per id, which makes this several
+    times cheaper than `str(ULID())` for bulk loads.
+    """
+    value = int(start or ULID())
+    while True:
+        head = str(ULID.from_int(value))[:-6]
+        first = value & ((1 << _LOW_BITS) - 1)
+        for low in range(first, 1 << _LOW_BITS):
+            yield (
+                head
+                + _PAIRS[low >> 20]
+                + _PAIRS[(low >> 10) & 0x3FF]
+                + _PAIRS[low & 0x3FF]
+            )
+        value = (value | ((1 << _LOW_BITS) - 1)) + 1
+
+
+def encode_ulid(value: int) -> str:
+    """The 26-character Crockford base32 form of a 128-bit ULID value."""
+    parts = [_CROCKFORD[value >> 125]]
+    for shift in range(115, 0, -10):
+        parts.append(_PAIRS[(value >> shift) & 0x3FF])
+    parts.append(_CROCKFORD[value & 0x1F])
+
+    return "".join(parts)
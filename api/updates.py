@@ -0,0 +1,98 @@
+from weakref import WeakSet
+
+from psycopg import AsyncConnection, AsyncCursor
+from pydantic import BaseModel
+
+
+class UpdateBuilder:
+    """
+    Canonical `UPDATE ... SET` statements for partial updates.
+
+    A PATCH only sets the fields the client sent, so building the SET list
+    naively yields a different query string per request shape. Here columns
+    always appear in model field order and the statement is keyed by the
+    bitmask of set fields, so every request with the same mask reuses one
+    string and each connection prepares it once. Column names come only from
+    the model's fields, never from request data. Every statement also bumps
+    `updated_at`.
+    """
+
+    def __init__(self, table: str, model: type[BaseModel], returning: str):
+        self.table = table
+        self.columns = tuple(model.model_fields)
+        self.returning = returning
+        self._statements: dict[int, str] = {}
+        self._executes: dict[int, int] = {}
+        self._prepares: dict[int, int] = {}
+        self._prepared_on: dict[int, WeakSet[AsyncConnection]] = {}
+
+    def statement(self, mask: int) -> str:
+        query = self._statements.get(mask)
+        if query is None:
+            cols = [
+                f"{col} = %s"
+                for bit, col in enumerate(self.columns)
+                if mask & (1 << bit)
+            ]
+            cols.append("updated_at = NOW()")
+            query = f"""
+                UPDATE {self.table}
+                SET {", ".join(cols)}
+                WHERE id = %s
+                RETURNING {self.returning}
+            """
+            self._statements[mask] = query
+            self._executes[mask] = 0
+            self._prepares[mask] = 0
+            self._prepared_on[mask] = WeakSet()
+
+        return query
+
+    def build(self, id: str, req: BaseModel) -> tuple[int, str, list]:
+        """The mask, statement and parameters that apply the non-null fields of `req`."""
+        mask = 0
+        params = []
+        for bit, col in enumerate(self.columns):
+            val = getattr(req, col)
+            if val is not None:
+                mask |= 1 << bit
+                params.append(val)
+        params.append(id)
+
+        return mask, self.statement(mask), params
+
+    async def execute(self, cur: AsyncCursor, id: str, req: BaseModel) -> None:
+        mask, query, params = self.build(id, req)
+        await cur.execute(query, params, prepare=True)
+
+        # psycopg prepares a statement on the first prepare=True execute on
+        # each connection, so count first executes per connection as prepares.
+        self._executes[mask] += 1
+        if cur.connection not in self._prepared_on[mask]:
+            self._prepared_on[mask].add(cur.connection)
+            self._prepares[mask] += 1
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {
+            ",".join(
+                col for bit, col in enumerate(self.columns) if mask & (1 << bit)
+            ): {
+                "mask": mask,
+                "prepares": self._prepares[mask],
+                "executes": self._executes[mask],
+            }
+            for mask in self._statements
+        }
+
+
+# Every update builder the routers use, by table, for stats.
+update_builders: dict[str, UpdateBuilder] = {}
+
+
+def register_update(
+    table: str, model: type[BaseModel], returning: str = "*"
+) -> UpdateBuilder:
+    builder = UpdateBuilder(table, model, returning)
+    update_builders[table] = builder
+
+    return builder
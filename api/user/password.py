@@ -0,0 +1,96 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Final
+
+import bcrypt
+from fastapi import HTTPException, status
+
+# Uvicorn's and gunicorn's worker count; every worker opens its own pool, so
+# by default they split the cores between them.
+WEB_CONCURRENCY: Final = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+PASSWORD_WORKERS: Final = int(
+    os.getenv("PASSWORD_WORKERS", str(max(1, (os.cpu_count() or 1) // WEB_CONCURRENCY)))
+)
+PASSWORD_MAX_IN_FLIGHT: Final = int(
+    os.getenv("PASSWORD_MAX_IN_FLIGHT", str(PASSWORD_WORKERS * 4))
+)
+PASSWORD_RETRY_AFTER_SECONDS: Final = int(
+    os.getenv("PASSWORD_RETRY_AFTER_SECONDS", "1")
+)
+
+_executor: ProcessPoolExecutor | None = None
+
+
+def open_password_pool() -> None:
+    global _executor
+    # Fork workers from a clean server process rather than from this one, which
+    # holds the event loop, open sockets and pool state.
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload([__name__])
+    _executor = ProcessPoolExecutor(max_workers=PASSWORD_WORKERS, mp_context=context)
+
+
+async def close_password_pool() -> None:
+    global _executor
+    if _executor is not None:
+        executor, _executor = _executor, None
+        # Joining the worker processes blocks, so do it off the event loop.
+        await asyncio.to_thread(executor.shutdown, cancel_futures=True)
+
+
+def _hashpw(password: bytes) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt())
+
+
+def _checkpw(password: bytes, hashed: bytes) -> bool:
+    return bcrypt.checkpw(password, hashed)
+
+
+async def hash_password(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    hashed = await loop.run_in_executor(_executor, _hashpw, password.encode())
+
+    return hashed.decode()
+
+
+async def check_password(password: str, hashed: str) -> bool:
+    loop = asyncio.get_running_loop()
+
+    return await loop.run_in_executor(
+        _executor, _checkpw, password.encode(), hashed.encode()
+    )
+
+
+class AdmissionLimiter:
+    """
+    Caps concurrent password work and rejects the excess with 503 + Retry-After
+    instead of letting it queue behind the process pool forever.
+    """
+
+    def __init__(self, limit: int, retry_after: int):
+        self.limit = limit
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.rejected = 0
+
+    def __enter__(self):
+        if self.in_flight >= self.limit:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="too many authentication requests, retry later",
+                headers={"Retry-After": str(self.retry_after)},
+            )
+        self.in_flight += 1
+
+        return self
+
+    def __exit__(self, *exc_info):
+        self.in_flight -= 1
+
+
+password_admission = AdmissionLimiter(
+    limit=PASSWORD_MAX_IN_FLIGHT, retry_after=PASSWORD_RETRY_AFTER_SECONDS
+)
@@ -2,14 +2,15 @@ import os
 from datetime import datetime, timedelta, timezone
 from typing import Final
 
-import bcrypt
 import jwt
 from dotenv import load_dotenv
 from fastapi import APIRouter, HTTPException, status
-from fastapi.responses import ORJSONResponse
-from psycopg.rows import dict_row
+from psycopg.rows import class_row, dict_row
 from ulid import ULID
 
+from api.rows import UserRow
+from api.timing import TimedJSONResponse
+from api.user.password import check_password, hash_password, password_admission
 from api.user.schema import LoginReq, LoginResp, RegisterReq, RegisterResp
 from db import pool
 
@@ -22,85 +23,90 @@ user_router = APIRouter(prefix="/users", tags=["users"])
 
 @user_router.post(
     "/register",
-    response_class=ORJSONResponse,
+    response_class=TimedJSONResponse,
     response_model=RegisterResp,
 )
-def register(req: RegisterReq):
-    try:
-        with (
-            pool.connection() as conn,
-            conn.transaction(),
-            conn.cursor(row_factory=dict_row) as cur,
-        ):
-            query = """
-                INSERT INTO users
-                VALUES(%s, %s, %s, %s, %s)
-                RETURNING username, email
-            """
-            params = [
-                str(ULID()),
-                req.profile_picture,
-                req.username,
-                req.email,
-                bcrypt.hashpw(req.password.encode(), bcrypt.gensalt()).decode(),
-            ]
-            user = cur.execute(query, params, prepare=True).fetchone()
+async def register(req: RegisterReq):
+    with password_admission:
+        try:
+            hashed_password = await hash_password(req.password)
+            async with (
+                pool.connection() as conn,
+                conn.transaction(),
+                conn.cursor(row_factory=dict_row) as cur,
+            ):
+                query = """
+                    INSERT INTO users
+                    VALUES(%s, %s, %s, %s, %s)
+                    RETURNING username, email
+                """
+                params = [
+                    str(ULID()),
+                    req.profile_picture,
+                    req.username,
+                    req.email,
+                    hashed_password,
+                ]
+                await cur.execute(query, params, prepare=True)
+                user = await cur.fetchone()
 
-        return ORJSONResponse(
-            content={
-                "message": "user is registered",
-                "data": user,
-            },
-            status_code=status.HTTP_200_OK,
-        )
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=str(e),
-        )
+            return TimedJSONResponse(
+                content={
+                    "message": "user is registered",
+                    "data": user,
+                },
+                status_code=status.HTTP_200_OK,
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e),
+            )
 
 
 @user_router.post(
     "/login",
-    response_class=ORJSONResponse,
+    response_class=TimedJSONResponse,
     response_model=LoginResp | None,
 )
-def login(req: LoginReq):
-    try:
-        with (
-            pool.connection() as conn,
-            conn.cursor(row_factory=dict_row) as cur,
-        ):
-            query = """
-                SELECT id, username, password FROM users WHERE username = %s;
-            """
-            user = cur.execute(query, [req.username], prepare=True).fetchone()
+async def login(req: LoginReq):
+    with password_admission:
+        try:
+            async with (
+                pool.connection() as conn,
+                conn.cursor(row_factory=class_row(UserRow)) as cur,
+            ):
+                query = """
+                    SELECT id, username, password FROM users WHERE username = %s;
+                """
+                await cur.execute(query, [req.username], prepare=True)
+                user = await cur.fetchone()
 
+            # The connection is back in the pool before bcrypt runs, so a login
+            # storm can't starve other endpoints of connections.
             if user is None:
-                return ORJSONResponse(
+                return TimedJSONResponse(
                     content={"token": None},
                     status_code=status.HTTP_200_OK,
                 )
 
-            is_password_match = bcrypt.checkpw(
-                req.password.encode(), str(user["password"]).encode()
-            )
+            is_password_match = await check_password(req.password, str(user.password))
             if is_password_match:
                 token_jwt = jwt.encode(
                     payload={
-                        "id": user["id"],
+                        "id": user.id,
                         "iat": datetime.now(timezone.utc),
                         "exp": datetime.now(timezone.utc) + timedelta(hours=1),
                     },
                     key=JWT_SECRET_KEY,
                     algorithm=JWT_ALGORITHM,
                 )
-                return ORJSONResponse(
+                return TimedJSONResponse(
                     content={"token": token_jwt},
                     status_code=status.HTTP_200_OK,
                 )
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=str(e),
-        )
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e),
+            )
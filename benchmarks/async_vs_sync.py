@@ -0,0 +1,151 @@
+"""
+Compare the sync (threadpool + ConnectionPool) and async (AsyncConnectionPool)
+request paths for GET /foods/{id}.
+
+The async app's food cache and request coalescing are turned off for the
+run, so every async request queries Postgres, as every sync one does.
+
+Usage:
+    python -m benchmarks.async_vs_sync --clients 500 --requests 20000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI, status
+from fastapi.responses import ORJSONResponse
+from psycopg.rows import dict_row
+from psycopg_pool import ConnectionPool
+from ulid import ULID
+
+import db
+from api.food.route import FOOD_COLUMNS, food_cache, food_flight
+from main import app as async_app
+
+
+def build_sync_app() -> tuple[FastAPI, ConnectionPool]:
+    sync_pool = ConnectionPool(
+        conninfo=db.DB_CONNINFO,
+        min_size=3,
+        max_size=10,
+        num_workers=9,
+        open=False,
+    )
+    sync_app = FastAPI()
+
+    @sync_app.get("/foods/{id}")
+    def get_by_id(id: str):
+        with (
+            sync_pool.connection() as conn,
+            conn.cursor(row_factory=dict_row) as cur,
+        ):
+            query = f"""
+                SELECT {FOOD_COLUMNS} FROM foods WHERE id = %s;
+            """
+            food = cur.execute(query, [id], prepare=True).fetchone()
+
+        return ORJSONResponse(content=food, status_code=status.HTTP_200_OK)
+
+    return sync_app, sync_pool
+
+
+async def seed_food() -> str:
+    async with db.pool.connection() as conn, conn.transaction():
+        cur = await conn.execute("SELECT id FROM foods LIMIT 1")
+        row = await cur.fetchone()
+        if row is not None:
+            return row[0]
+
+        user_id, owner_id, location_id, food_id = (str(ULID()) for _ in range(4))
+        await conn.execute(
+            """
+            INSERT INTO users (id, username, email, password)
+            VALUES (%s, %s, %s, 'x')
+            """,
+            [user_id, f"bench-{user_id}", f"{user_id}@bench.local"],
+        )
+        await conn.execute(
+            "INSERT INTO owners (id, image, name) VALUES (%s, 'image', 'owner')",
+            [owner_id],
+        )
+        await conn.execute(
+            """
+            INSERT INTO locations (id, district, city, province, postal_code, details)
+            VALUES (%s, 'd', 'c', 'p', '0', 'x')
+            """,
+            [location_id],
+        )
+        await conn.execute(
+            """
+            INSERT INTO foods (id, user_id, owner_id, location_id, image, name,
+                               description, price, review)
+            VALUES (%s, %s, %s, %s, 'i', 'n', 'd', 1, 'r')
+            """,
+            [food_id, user_id, owner_id, location_id],
+        )
+        return food_id
+
+
+async def drive(app: FastAPI, path: str, clients: int, total: int) -> dict:
+    latencies: list[float] = []
+    remaining = total
+
+    async def client(http: httpx.AsyncClient):
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            resp = await http.get(path)
+            latencies.append(time.perf_counter() - start)
+            resp.raise_for_status()
+
+    transport = httpx.ASGITransport(app=app)
+    limits = httpx.Limits(max_connections=None)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", limits=limits
+    ) as http:
+        start = time.perf_counter()
+        await asyncio.gather(*(client(http) for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+    }
+
+
+async def main(clients: int, total: int):
+    async with async_app.router.lifespan_context(async_app):
+        food_id = await seed_food()
+        food_cache.max_size = 0
+        food_flight.enabled = False
+        async_result = await drive(async_app, f"/foods/{food_id}", clients, total)
+
+    sync_app, sync_pool = build_sync_app()
+    sync_pool.open(wait=True)
+    try:
+        sync_result = await drive(sync_app, f"/foods/{food_id}", clients, total)
+    finally:
+        sync_pool.close()
+
+    print(f"{'mode':<6} {'requests':>9} {'rps':>9} {'p50_ms':>9} {'p99_ms':>9}")
+    for mode, result in (("sync", sync_result), ("async", async_result)):
+        print(
+            f"{mode:<6} {result['requests']:>9} {result['rps']:>9} "
+            f"{result['p50_ms']:>9} {result['p99_ms']:>9}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.clients, args.requests))
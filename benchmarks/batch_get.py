@@ -0,0 +1,80 @@
+"""
+Resolve N food ids with one POST /foods/batch-get versus N GET /foods/{id}
+calls, issued one after another and all at once. The per-id cache is cleared
+before every round so both sides hit Postgres.
+
+Usage:
+    python -m benchmarks.batch_get --ids 200 --rounds 20
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+import db
+from api.food.route import food_cache
+from main import app
+
+
+async def timed(rounds: int, resolve) -> float:
+    elapsed = []
+    for _ in range(rounds):
+        food_cache.clear()
+        start = time.perf_counter()
+        await resolve()
+        elapsed.append((time.perf_counter() - start) * 1_000)
+
+    return statistics.median(elapsed)
+
+
+async def main(n_ids: int, rounds: int):
+    async with app.router.lifespan_context(app):
+        async with db.pool.connection() as conn:
+            cur = await conn.execute(
+                "SELECT id FROM foods ORDER BY random() LIMIT %s", [n_ids]
+            )
+            ids = [id for (id,) in await cur.fetchall()]
+        if len(ids) < n_ids:
+            raise SystemExit("seed some foods first: python -m benchmarks.seed")
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as http:
+
+            async def sequential():
+                for id in ids:
+                    (await http.get(f"/foods/{id}")).raise_for_status()
+
+            async def concurrent():
+                for resp in await asyncio.gather(
+                    *(http.get(f"/foods/{id}") for id in ids)
+                ):
+                    resp.raise_for_status()
+
+            async def batch():
+                resp = await http.post("/foods/batch-get", json={"ids": ids})
+                resp.raise_for_status()
+                if [food["id"] for food in resp.json()["data"]] != ids:
+                    raise AssertionError("batch-get lost the request order")
+
+            results = {
+                "sequential get_by_id": await timed(rounds, sequential),
+                "concurrent get_by_id": await timed(rounds, concurrent),
+                "batch-get": await timed(rounds, batch),
+            }
+
+    for name, ms in results.items():
+        print(f"{name:<22} {ms:>9.2f} ms for {n_ids} ids")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ids", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.ids, args.rounds))
@@ -0,0 +1,92 @@
+"""
+Measure POST /foods/bulk throughput in rows/sec.
+
+Usage:
+    python -m benchmarks.bulk_ingest --rows 100000 --format ndjson
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import jwt
+import orjson
+
+import db
+from api.auth_middleware import JWT_ALGORITHM, JWT_SECRET_KEY
+from main import app
+
+
+async def main(n_rows: int, format: str):
+    async with app.router.lifespan_context(app):
+        async with db.pool.connection() as conn:
+            cur = await conn.execute(
+                "SELECT user_id, owner_id, location_id FROM foods LIMIT 1"
+            )
+            row = await cur.fetchone()
+        if row is None:
+            raise SystemExit("seed some foods first: python -m benchmarks.seed")
+        user_id, owner_id, location_id = row
+
+        records = [
+            {
+                "owner_id": owner_id,
+                "location_id": location_id,
+                "image": f"bulk-{i}.jpg",
+                "name": f"bulk food {i}",
+                "description": "bulk loaded",
+                "price": 1_000 + i,
+                "review": "ok",
+            }
+            for i in range(n_rows)
+        ]
+        if format == "ndjson":
+            body = b"".join(
+                orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
+                for record in records
+            )
+            content_type = "application/x-ndjson"
+        else:
+            body = orjson.dumps(records)
+            content_type = "application/json"
+
+        token = jwt.encode(
+            payload={
+                "id": user_id,
+                "exp": datetime.now(timezone.utc) + timedelta(hours=1),
+            },
+            key=JWT_SECRET_KEY,
+            algorithm=JWT_ALGORITHM,
+        )
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=None
+        ) as http:
+            start = time.perf_counter()
+            resp = await http.post(
+                "/foods/bulk",
+                content=body,
+                headers={
+                    "Authorization": f"Bearer {token}",
+                    "Content-Type": content_type,
+                },
+            )
+            elapsed = time.perf_counter() - start
+
+    resp.raise_for_status()
+    result = resp.json()
+    print(
+        f"{result['inserted']} rows inserted, {result['failed']} rejected "
+        f"in {elapsed:.2f}s ({result['inserted'] / elapsed:,.0f} rows/sec)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--format", choices=["ndjson", "json"], default="ndjson")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.rows, args.format))
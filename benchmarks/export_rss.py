@@ -0,0 +1,101 @@
+"""
+Stream GET /foods/export and check that peak RSS stays under a fixed ceiling.
+
+The response is driven straight through the ASGI app and discarded chunk by
+chunk, since buffering clients would measure their own memory instead.
+
+Usage:
+    python -m benchmarks.export_rss --seed 1000000 --max-rss-mb 64
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import resource
+import sys
+import time
+
+from benchmarks.seed import Dataset, seed
+from main import app
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def export(format: str) -> int:
+    n_bytes = 0
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/foods/export",
+        "raw_path": b"/foods/export",
+        "query_string": f"format={format}".encode(),
+        "root_path": "",
+        "headers": [],
+        "client": ("bench", 0),
+        "server": ("bench", 80),
+    }
+
+    requested = False
+    finished = asyncio.Event()
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal n_bytes
+        if message["type"] == "http.response.start" and message["status"] != 200:
+            raise RuntimeError(f"export failed with status {message['status']}")
+        if message["type"] == "http.response.body":
+            n_bytes += len(message.get("body", b""))
+            if not message.get("more_body", False):
+                finished.set()
+
+    async with app.router.lifespan_context(app):
+        await app(scope, receive, send)
+
+    return n_bytes
+
+
+def main(format: str, max_rss_mb: float) -> int:
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    n_bytes = asyncio.run(export(format))
+    elapsed = time.perf_counter() - start
+    growth = peak_rss_mb() - baseline
+
+    print(
+        f"exported {n_bytes / 1024 / 1024:.1f} MiB as {format} in {elapsed:.1f}s, "
+        f"peak RSS growth {growth:.1f} MiB (ceiling {max_rss_mb} MiB)"
+    )
+
+    return 0 if growth <= max_rss_mb else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument("--seed", type=int, default=0, help="foods to seed first")
+    parser.add_argument("--max-rss-mb", type=float, default=64)
+    args = parser.parse_args()
+
+    if args.seed:
+        # Seed in a child process so its allocations don't count towards the
+        # export's peak RSS.
+        seeder = multiprocessing.Process(
+            target=seed, args=(Dataset(foods=args.seed, seed=time.time_ns()),)
+        )
+        seeder.start()
+        seeder.join()
+
+    sys.exit(main(args.format, args.max_rss_mb))
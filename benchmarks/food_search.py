@@ -0,0 +1,117 @@
+"""
+GET /foods/search latency per query, with the number of matching rows and
+whether the plan reads foods_search_idx or falls back to a sequential scan.
+
+Seed a few million rows first so the GIN index matters:
+    python -m benchmarks.seed --foods 3000000
+
+Usage:
+    python -m benchmarks.food_search --requests 200
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import jwt
+
+import db
+from api.auth_middleware import JWT_ALGORITHM, JWT_SECRET_KEY
+from main import app
+
+QUERIES = (
+    "kecap",
+    "terasi kemangi",
+    '"rendang sambal"',
+    "klepon or cendol",
+    "sate -ayam",
+    "nasi",
+)
+
+
+def plan_nodes(plan: dict) -> set[str]:
+    nodes = {plan["Node Type"]}
+    for child in plan.get("Plans", []):
+        nodes |= plan_nodes(child)
+
+    return nodes
+
+
+async def explain(q: str) -> tuple[int, set[str]]:
+    async with db.pool.connection() as conn:
+        cur = await conn.execute(
+            """
+            EXPLAIN (FORMAT JSON)
+            SELECT id FROM foods, websearch_to_tsquery('simple', %s) AS query
+            WHERE search @@ query
+            """,
+            [q],
+        )
+        ((plan,),) = await cur.fetchall()
+        cur = await conn.execute(
+            """
+            SELECT count(*) FROM foods
+            WHERE search @@ websearch_to_tsquery('simple', %s)
+            """,
+            [q],
+        )
+        (matches,) = await cur.fetchone()
+
+    return matches, plan_nodes(plan[0]["Plan"])
+
+
+async def main(n_requests: int, limit: int):
+    async with app.router.lifespan_context(app):
+        token = jwt.encode(
+            payload={
+                "id": "01KBENCHSEARCH00000000000",
+                "exp": datetime.now(timezone.utc) + timedelta(hours=1),
+            },
+            key=JWT_SECRET_KEY,
+            algorithm=JWT_ALGORITHM,
+        )
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport,
+            base_url="http://bench",
+            headers={"Authorization": f"Bearer {token}"},
+        ) as http:
+            print(f"{'query':<22} {'matches':>9} {'p50 ms':>8} {'p99 ms':>8}  plan")
+            for q in QUERIES:
+                matches, nodes = await explain(q)
+
+                latencies = []
+                for _ in range(n_requests):
+                    start = time.perf_counter()
+                    resp = await http.get(
+                        "/foods/search", params={"q": q, "limit": limit}
+                    )
+                    latencies.append((time.perf_counter() - start) * 1_000)
+                    resp.raise_for_status()
+
+                # The next page must pick up where the first stopped.
+                cursor = resp.json()["next_cursor"]
+                if cursor is not None:
+                    (
+                        await http.get(
+                            "/foods/search",
+                            params={"q": q, "limit": limit, "after": cursor},
+                        )
+                    ).raise_for_status()
+
+                p50 = statistics.median(latencies)
+                p99 = statistics.quantiles(latencies, n=100)[98]
+                scan = "Seq Scan" if "Seq Scan" in nodes else "Bitmap Index Scan"
+                print(f"{q:<22} {matches:>9,} {p50:>8.2f} {p99:>8.2f}  {scan}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.requests, args.limit))
@@ -0,0 +1,103 @@
+"""
+Rebuild owner_food_stats and location_food_stats from foods and report every
+row where the trigger-maintained summary drifted from it:
+
+    python -m benchmarks.food_stats_check
+
+The comparison reads one REPEATABLE READ snapshot, so it runs alongside
+writes. --repair replaces both summaries with the rebuilt rows, holding a
+SHARE lock on foods, which blocks writes, while it does.
+
+Exits with status 1 when a summary drifted.
+"""
+
+import argparse
+import sys
+
+import psycopg
+from psycopg.rows import dict_row
+
+import db
+from api.food_stats.query import FOOD_STATS
+
+STAT_COLUMNS = ("food_count", "price_sum", "min_price", "max_price", "latest_food_id")
+
+
+def rebuild_query(key: str) -> str:
+    return f"""
+        SELECT {key}, count(*) AS food_count, sum(price) AS price_sum,
+               min(price) AS min_price, max(price) AS max_price,
+               max(id) AS latest_food_id
+        FROM foods
+        GROUP BY {key}
+    """
+
+
+def drift(cur, table: str, key: str) -> list[dict]:
+    """Rows whose stored stats differ from the rebuilt ones, or exist on one side."""
+    stored = ", ".join(f"stored.{col}" for col in STAT_COLUMNS)
+    rebuilt = ", ".join(f"rebuilt.{col}" for col in STAT_COLUMNS)
+    cur.execute(
+        f"""
+        SELECT coalesce(stored.{key}, rebuilt.{key}) AS id,
+               {", ".join(f"stored.{col} AS stored_{col}" for col in STAT_COLUMNS)},
+               {", ".join(f"rebuilt.{col} AS rebuilt_{col}" for col in STAT_COLUMNS)}
+        FROM {table} AS stored
+        FULL JOIN ({rebuild_query(key)}) AS rebuilt USING ({key})
+        WHERE ({stored}) IS DISTINCT FROM ({rebuilt})
+        ORDER BY 1
+        """
+    )
+
+    return cur.fetchall()
+
+
+def repair(conn) -> None:
+    with conn.transaction():
+        conn.execute("LOCK TABLE foods IN SHARE MODE")
+        for table, key in FOOD_STATS.values():
+            conn.execute(f"DELETE FROM {table}")
+            conn.execute(
+                f"""
+                INSERT INTO {table} ({key}, {", ".join(STAT_COLUMNS)})
+                {rebuild_query(key)}
+                """
+            )
+
+
+def main(show: int, fix: bool) -> int:
+    with psycopg.connect(db.DB_CONNINFO, autocommit=True) as conn:
+        drifted = 0
+        with (
+            conn.transaction(),
+            conn.cursor(row_factory=dict_row) as cur,
+        ):
+            cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+            for table, key in FOOD_STATS.values():
+                rows = drift(cur, table, key)
+                drifted += len(rows)
+                print(f"{table}: {len(rows)} drifted")
+                for row in rows[:show]:
+                    changed = [
+                        f"{col} {row[f'stored_{col}']} != {row[f'rebuilt_{col}']}"
+                        for col in STAT_COLUMNS
+                        if row[f"stored_{col}"] != row[f"rebuilt_{col}"]
+                    ]
+                    print(f"  {row['id']}: {', '.join(changed)}")
+
+        if drifted and fix:
+            repair(conn)
+            print("rebuilt both summaries")
+
+    return 1 if drifted else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--show", type=int, default=20, help="drifted rows to print")
+    parser.add_argument(
+        "--repair", action="store_true", help="rebuild the summaries on drift"
+    )
+    args = parser.parse_args()
+
+    sys.exit(main(args.show, args.repair))
@@ -0,0 +1,658 @@
+"""
+Load test of every route in main.py against a throwaway Postgres.
+
+The harness runs initdb for a cluster in a temporary directory and starts it on
+--port. It then applies migrations/ with yoyo, seeds users, owners, locations
+and foods, and drives each route in-process through httpx's ASGI transport at
+every --concurrency level. RPS, p50/p95/p99 latency, mean pool wait and errors
+per route and level go to --out as JSON, together with the commit and
+settings, so runs can be diffed between commits.
+
+With --baseline the run is compared against an earlier result file, and the
+harness exits 1 if any route's p95 grew, or its RPS dropped, by more than
+--tolerance, or if it has more errors than before. Pass --current to compare
+two existing files without running anything.
+
+initdb and pg_ctl come from --pg-bin, else from PATH, and refuse to run as
+root. Migrations listed in --fake-migration are marked as applied rather than
+run, e.g. the pg_trgm one on a build without contrib; routes that depend on
+them then show up as errors.
+
+Usage:
+    python -m benchmarks.harness --foods 100000 --concurrency 1,8,32 \\
+        --out bench.json
+    python -m benchmarks.harness --baseline bench.json --out bench-new.json
+    python -m benchmarks.harness --baseline bench.json --current bench-new.json
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import httpx
+import orjson
+import psycopg
+from ulid import ULID
+
+ROOT = Path(__file__).resolve().parent.parent
+DB_NAME = "kumande_bench"
+PASSWORD = "Bench-pass1"
+
+
+class EphemeralPostgres:
+    """A Postgres cluster in a temporary directory, removed on exit."""
+
+    def __init__(self, bin_dir: str | None, port: int, keep: bool = False):
+        self.bin_dir = bin_dir
+        self.port = port
+        self.keep = keep
+        self.dir: Path | None = None
+
+    def _bin(self, name: str) -> str:
+        path = (
+            shutil.which(name, path=self.bin_dir)
+            if self.bin_dir
+            else shutil.which(name)
+        )
+        if path is None:
+            raise SystemExit(f"{name} not found, pass --pg-bin")
+
+        return path
+
+    def _run(self, *args: str) -> None:
+        result = subprocess.run(args, capture_output=True, text=True, check=False)
+        if result.returncode != 0:
+            raise SystemExit(f"{args[0]} failed:\n{result.stderr or result.stdout}")
+
+    def __enter__(self):
+        self.dir = Path(tempfile.mkdtemp(prefix="kumande-bench-"))
+        data = self.dir / "data"
+        self._run(
+            self._bin("initdb"), "-D", str(data), "-U", "postgres", "-A", "trust",
+            "-E", "UTF8", "--no-sync",
+        )  # fmt: skip
+        self._run(
+            self._bin("pg_ctl"), "-D", str(data), "-l", str(self.dir / "postgres.log"),
+            "-o", f"-p {self.port} -k {self.dir} -c listen_addresses=localhost",
+            "-w", "start",
+        )  # fmt: skip
+        with psycopg.connect(self.conninfo("postgres"), autocommit=True) as conn:
+            conn.execute(f"CREATE DATABASE {DB_NAME}")
+
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._run(
+            self._bin("pg_ctl"), "-D", str(self.dir / "data"), "-m", "fast", "stop"
+        )
+        if self.keep:
+            print(f"cluster kept in {self.dir}", file=sys.stderr)
+        else:
+            shutil.rmtree(self.dir, ignore_errors=True)
+
+    def conninfo(self, dbname: str = DB_NAME) -> str:
+        return f"host=localhost port={self.port} dbname={dbname} user=postgres"
+
+    def use(self) -> None:
+        """Point db.py at this cluster. Must run before db or main is imported."""
+        os.environ.update(
+            DB_HOST="localhost",
+            DB_PORT=str(self.port),
+            DB_NAME=DB_NAME,
+            DB_USER="postgres",
+            DB_PASSWORD="postgres",
+            DB_SSLMODE="disable",
+            DB_REPLICA_HOST="",
+        )
+
+
+def migrate(port: int, fake: list[str]) -> None:
+    from yoyo import get_backend, read_migrations
+
+    backend = get_backend(f"postgresql+psycopg://postgres@localhost:{port}/{DB_NAME}")
+    migrations = read_migrations(str(ROOT / "migrations"))
+    with backend.lock():
+        if fake:
+            backend.mark_migrations(migrations.filter(lambda m: m.id in fake))
+        backend.apply_migrations(backend.to_apply(migrations))
+
+
+@dataclass
+class Fixtures:
+    token: str
+    food_ids: list[str]
+    owner_ids: list[str]
+    location_ids: list[str]
+    # Ids created by the POST scenarios, consumed by the DELETE ones.
+    created: dict[str, list[str]] = field(
+        default_factory=lambda: {"foods": [], "owners": [], "locations": []}
+    )
+
+
+@dataclass
+class Scenario:
+    method: str
+    route: str
+    # Builds the url and httpx request arguments of one request.
+    request: Callable[[random.Random], tuple[str, dict]]
+    on_response: Callable[[httpx.Response], None] | None = None
+    # Caps --requests for routes too slow to run hundreds of times.
+    max_requests: int | None = None
+
+    @property
+    def name(self) -> str:
+        return f"{self.method} {self.route}"
+
+
+def scenarios(fx: Fixtures, seed: int) -> list[Scenario]:
+    from benchmarks.seed import Dataset, username, words
+
+    auth = {"headers": {"Authorization": f"Bearer {fx.token}"}}
+
+    def get(url: str) -> Callable[[random.Random], tuple[str, dict]]:
+        return lambda rng: (url, auth)
+
+    def some(ids: list[str], rng: random.Random, k: int = 50) -> list[str]:
+        return rng.sample(ids, min(k, len(ids)))
+
+    def keep_id(entity: str, nested: bool = True) -> Callable[[httpx.Response], None]:
+        def on_response(resp: httpx.Response) -> None:
+            body = resp.json()
+            fx.created[entity].append(body["data"]["id"] if nested else body["id"])
+
+        return on_response
+
+    def created(entity: str) -> str:
+        ids = fx.created[entity]
+        return ids.pop() if ids else str(ULID())
+
+    def food(rng: random.Random) -> dict:
+        return {
+            "owner_id": rng.choice(fx.owner_ids),
+            "location_id": rng.choice(fx.location_ids),
+            "image": "bench.jpg",
+            "name": words(rng, 2),
+            "description": words(rng, 8),
+            "price": rng.randint(1_000, 100_000),
+            "review": words(rng, 5),
+        }
+
+    def register(rng: random.Random) -> tuple[str, dict]:
+        name = f"bench-{ULID()}"
+        return "/users/register", {
+            "json": {
+                "username": name,
+                "email": f"{name}@example.com",
+                "fullname": "bench",
+                "password": PASSWORD,
+            }
+        }
+
+    seeded_user = username(Dataset(seed=seed), 0)
+
+    def login(rng: random.Random) -> tuple[str, dict]:
+        return "/users/login", {"json": {"username": seeded_user, "password": PASSWORD}}
+
+    def bulk(rng: random.Random) -> tuple[str, dict]:
+        body = b"".join(
+            orjson.dumps(food(rng), option=orjson.OPT_APPEND_NEWLINE)
+            for _ in range(100)
+        )
+        headers = {**auth["headers"], "Content-Type": "application/x-ndjson"}
+        return "/foods/bulk", {"content": body, "headers": headers}
+
+    return [
+        Scenario("GET", "/", get("/")),
+        Scenario("GET", "/cache/stats", get("/cache/stats")),
+        Scenario("GET", "/singleflight/stats", get("/singleflight/stats")),
+        Scenario("GET", "/updates/stats", get("/updates/stats")),
+        Scenario("GET", "/metrics", get("/metrics")),
+        Scenario("POST", "/users/register", register, max_requests=20),
+        Scenario("POST", "/users/login", login, max_requests=20),
+        Scenario("GET", "/locations/", get("/locations/?limit=50")),
+        Scenario(
+            "GET",
+            "/locations/search",
+            lambda rng: (f"/locations/search?q=city {rng.randrange(100)}", auth),
+        ),
+        Scenario("GET", "/locations/hierarchy", get("/locations/hierarchy")),
+        Scenario(
+            "POST",
+            "/locations/batch-get",
+            lambda rng: (
+                "/locations/batch-get",
+                {**auth, "json": {"ids": some(fx.location_ids, rng)}},
+            ),
+        ),
+        Scenario(
+            "GET",
+            "/locations/{id}",
+            lambda rng: (f"/locations/{rng.choice(fx.location_ids)}", auth),
+        ),
+        Scenario(
+            "GET",
+            "/locations/{id}/stats",
+            lambda rng: (f"/locations/{rng.choice(fx.location_ids)}/stats", auth),
+        ),
+        Scenario(
+            "POST",
+            "/locations/",
+            lambda rng: (
+                "/locations/",
+                {
+                    **auth,
+                    "json": {
+                        "district": "bench",
+                        "city": f"city {rng.randrange(100)}",
+                        "province": "province",
+                        "postal_code": "0",
+                        "details": words(rng, 3),
+                    },
+                },
+            ),
+            on_response=keep_id("locations"),
+        ),
+        Scenario(
+            "PATCH",
+            "/locations/{id}",
+            lambda rng: (
+                f"/locations/{rng.choice(fx.location_ids)}",
+                {**auth, "json": {"details": words(rng, 3)}},
+            ),
+        ),
+        Scenario(
+            "DELETE",
+            "/locations/{id}",
+            lambda rng: (f"/locations/{created('locations')}", auth),
+        ),
+        Scenario("GET", "/owners/", get("/owners/?limit=50")),
+        Scenario(
+            "POST",
+            "/owners/batch-get",
+            lambda rng: (
+                "/owners/batch-get",
+                {**auth, "json": {"ids": some(fx.owner_ids, rng)}},
+            ),
+        ),
+        Scenario(
+            "GET",
+            "/owners/{id}",
+            lambda rng: (f"/owners/{rng.choice(fx.owner_ids)}", auth),
+        ),
+        Scenario(
+            "GET",
+            "/owners/{id}/stats",
+            lambda rng: (f"/owners/{rng.choice(fx.owner_ids)}/stats", auth),
+        ),
+        Scenario(
+            "POST",
+            "/owners/",
+            lambda rng: (
+                "/owners/",
+                {**auth, "json": {"image": "bench.jpg", "name": words(rng, 2)}},
+            ),
+            on_response=keep_id("owners"),
+        ),
+        Scenario(
+            "PATCH",
+            "/owners/{id}",
+            lambda rng: (
+                f"/owners/{rng.choice(fx.owner_ids)}",
+                {**auth, "json": {"image": "bench.jpg", "name": words(rng, 2)}},
+            ),
+        ),
+        Scenario(
+            "DELETE",
+            "/owners/{id}",
+            lambda rng: (f"/owners/{created('owners')}", auth),
+        ),
+        Scenario("GET", "/foods/", get("/foods/?limit=50")),
+        Scenario("GET", "/foods/export", get("/foods/export"), max_requests=3),
+        Scenario(
+            "GET",
+            "/foods/search",
+            lambda rng: (f"/foods/search?q={words(rng, 2)}&limit=20", auth),
+        ),
+        Scenario(
+            "POST",
+            "/foods/batch-get",
+            lambda rng: (
+                "/foods/batch-get",
+                {**auth, "json": {"ids": some(fx.food_ids, rng)}},
+            ),
+        ),
+        Scenario(
+            "GET",
+            "/foods/{id}",
+            lambda rng: (f"/foods/{rng.choice(fx.food_ids)}", auth),
+        ),
+        Scenario(
+            "POST",
+            "/foods/",
+            lambda rng: ("/foods/?id=bench", {**auth, "json": food(rng)}),
+            on_response=keep_id("foods", nested=False),
+        ),
+        Scenario("POST", "/foods/bulk", bulk, max_requests=20),
+        Scenario(
+            "PATCH",
+            "/foods/{id}",
+            lambda rng: (
+                f"/foods/{rng.choice(fx.food_ids)}",
+                {**auth, "json": {"description": words(rng, 8)}},
+            ),
+        ),
+        Scenario(
+            "DELETE",
+            "/foods/{id}",
+            lambda rng: (f"/foods/{created('foods')}", auth),
+        ),
+    ]
+
+
+def app_routes(app) -> set[str]:
+    """`METHOD /path` of every route main.py serves, hidden ones included."""
+    from fastapi.routing import APIRoute
+
+    routes = {
+        f"{method.upper()} {path}"
+        for path, operations in app.openapi()["paths"].items()
+        for method in operations
+    }
+    routes |= {
+        f"{method} {route.path}"
+        for route in app.routes
+        if isinstance(route, APIRoute)
+        for method in route.methods
+    }
+
+    return routes
+
+
+async def issue(
+    http: httpx.AsyncClient,
+    scenario: Scenario,
+    concurrency: int,
+    n_requests: int,
+    rng: random.Random,
+) -> tuple[list[float], dict[str, int]]:
+    """Send `n_requests` requests from `concurrency` workers; latencies and errors."""
+    latencies = []
+    errors: dict[str, int] = {}
+    remaining = iter(range(n_requests))
+
+    async def worker() -> None:
+        for _ in remaining:
+            url, kwargs = scenario.request(rng)
+            start = time.perf_counter()
+            resp = await http.request(scenario.method, url, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            if resp.status_code >= 400:
+                code = str(resp.status_code)
+                errors[code] = errors.get(code, 0) + 1
+            elif scenario.on_response is not None:
+                scenario.on_response(resp)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    return latencies, errors
+
+
+async def run_level(
+    http: httpx.AsyncClient,
+    scenario: Scenario,
+    concurrency: int,
+    n_requests: int,
+    rng: random.Random,
+) -> dict:
+    from api.cache import caches
+    from api.metrics import pool_wait_seconds
+
+    # Every level starts cold, so levels and runs don't inherit cache hits.
+    for cache in caches.values():
+        cache.clear()
+
+    waits_before, wait_before = pool_wait_seconds.totals("primary")
+    start = time.perf_counter()
+    latencies, errors = await issue(http, scenario, concurrency, n_requests, rng)
+    elapsed = time.perf_counter() - start
+    waits_after, wait_after = pool_wait_seconds.totals("primary")
+
+    percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    waits = waits_after - waits_before
+
+    return {
+        "requests": n_requests,
+        "errors": sum(errors.values()),
+        "error_statuses": errors,
+        "rps": round(n_requests / elapsed, 1),
+        "p50_ms": round(percentiles[49] * 1_000, 2),
+        "p95_ms": round(percentiles[94] * 1_000, 2),
+        "p99_ms": round(percentiles[98] * 1_000, 2),
+        "pool_wait_ms": round((wait_after - wait_before) / waits * 1_000, 3)
+        if waits
+        else 0.0,
+    }
+
+
+async def drive(args: argparse.Namespace) -> dict:
+    import jwt
+
+    import db
+    from api.auth_middleware import JWT_ALGORITHM, JWT_SECRET_KEY
+    from main import app
+
+    only = re.compile(args.only) if args.only else None
+    rng = random.Random(args.seed)
+
+    async with app.router.lifespan_context(app):
+        async with db.pool.connection() as conn:
+            samples = {}
+            for table in ("users", "foods", "owners", "locations"):
+                cur = await conn.execute(
+                    f"SELECT id FROM {table} ORDER BY id LIMIT %s", [args.sample]
+                )
+                samples[table] = [id for (id,) in await cur.fetchall()]
+
+        token = jwt.encode(
+            payload={
+                "id": samples["users"][0],
+                "exp": datetime.now(timezone.utc) + timedelta(hours=6),
+            },
+            key=JWT_SECRET_KEY,
+            algorithm=JWT_ALGORITHM,
+        )
+        fx = Fixtures(token, samples["foods"], samples["owners"], samples["locations"])
+        plan = scenarios(fx, args.seed)
+
+        routes = app_routes(app)
+        names = {scenario.name for scenario in plan}
+        if routes != names:
+            raise SystemExit(
+                f"routes without a scenario: {sorted(routes - names)}, "
+                f"scenarios without a route: {sorted(names - routes)}"
+            )
+
+        results: dict[str, dict] = {}
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=None
+        ) as http:
+            for scenario in plan:
+                if only is not None and not only.search(scenario.name):
+                    continue
+                n_requests = max(
+                    min(args.requests, scenario.max_requests or args.requests), 2
+                )
+                await issue(http, scenario, 1, min(args.warmup, n_requests), rng)
+                results[scenario.name] = {}
+                for concurrency in args.concurrency:
+                    level = await run_level(
+                        http, scenario, concurrency, n_requests, rng
+                    )
+                    results[scenario.name][str(concurrency)] = level
+                    print(
+                        f"{scenario.name:<26} c={concurrency:<3} "
+                        f"{level['rps']:>8.1f} rps  p50 {level['p50_ms']:>8.2f}  "
+                        f"p95 {level['p95_ms']:>8.2f}  p99 {level['p99_ms']:>8.2f} ms  "
+                        f"pool wait {level['pool_wait_ms']:.3f} ms  "
+                        f"errors {level['errors']}",
+                        file=sys.stderr,
+                    )
+
+    return results
+
+
+def git_commit() -> str | None:
+    result = subprocess.run(
+        ["git", "-c", "safe.directory=*", "describe", "--always", "--dirty"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+
+    return result.stdout.strip() or None
+
+
+def run(args: argparse.Namespace) -> dict:
+    with EphemeralPostgres(args.pg_bin, args.port, keep=args.keep) as cluster:
+        cluster.use()
+        os.environ.setdefault("JWT_SECRET_KEY", "bench")
+        os.environ.setdefault("JWT_ALGORITHM", "HS256")
+        # Keep the sampled timing log out of the measurements.
+        os.environ.setdefault("TIMING_LOG_SAMPLE_RATE", "0")
+        os.environ.setdefault("TIMING_LOG_SLOW_MS", "inf")
+
+        migrate(args.port, args.fake_migration)
+
+        from benchmarks.seed import Dataset, seed
+
+        start = time.perf_counter()
+        seed(
+            Dataset(
+                users=args.users,
+                owners=args.owners,
+                locations=args.locations,
+                foods=args.foods,
+                seed=args.seed,
+                password=PASSWORD,
+            ),
+            conninfo=cluster.conninfo(),
+            workers=args.workers,
+        )
+        with psycopg.connect(cluster.conninfo(), autocommit=True) as conn:
+            conn.execute("VACUUM ANALYZE")
+        print(f"seeded in {time.perf_counter() - start:.1f} s", file=sys.stderr)
+
+        results = asyncio.run(drive(args))
+
+    return {
+        "commit": git_commit(),
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "settings": {
+            "users": args.users,
+            "owners": args.owners,
+            "locations": args.locations,
+            "foods": args.foods,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+
+
+def regressions(
+    current: dict, baseline: dict, tolerance: float, min_delta_ms: float
+) -> list[str]:
+    """Routes and levels of `current` that are worse than `baseline`."""
+    found = []
+    for route, levels in baseline["results"].items():
+        for level, base in levels.items():
+            now = current["results"].get(route, {}).get(level)
+            if now is None:
+                continue
+            where = f"{route} c={level}"
+            if (
+                now["p95_ms"] > base["p95_ms"] * (1 + tolerance)
+                and now["p95_ms"] - base["p95_ms"] > min_delta_ms
+            ):
+                found.append(f"{where}: p95 {base['p95_ms']} -> {now['p95_ms']} ms")
+            if now["rps"] < base["rps"] * (1 - tolerance):
+                found.append(f"{where}: rps {base['rps']} -> {now['rps']}")
+            if now["errors"] > base["errors"]:
+                found.append(f"{where}: errors {base['errors']} -> {now['errors']}")
+
+    return found
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pg-bin", help="directory holding initdb and pg_ctl")
+    parser.add_argument("--port", type=int, default=54329)
+    parser.add_argument("--keep", action="store_true", help="keep the cluster dir")
+    parser.add_argument("--fake-migration", action="append", default=[])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--owners", type=int, default=1_000)
+    parser.add_argument("--locations", type=int, default=1_000)
+    parser.add_argument("--foods", type=int, default=100_000)
+    parser.add_argument(
+        "--concurrency",
+        type=lambda value: [int(level) for level in value.split(",")],
+        default=[1, 8, 32],
+    )
+    parser.add_argument("--requests", type=int, default=200, help="per route and level")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--sample", type=int, default=1_000, help="ids per table")
+    parser.add_argument("--seed", type=int, default=0, help="dataset and request seed")
+    parser.add_argument("--workers", type=int, help="seeding processes")
+    parser.add_argument("--only", help="regex of `METHOD /route` names to run")
+    parser.add_argument("--out", type=Path)
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--current", type=Path, help="compare this file, don't run")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument(
+        "--min-delta-ms",
+        type=float,
+        default=1.0,
+        help="ignore p95 growth smaller than this",
+    )
+    args = parser.parse_args()
+
+    if args.current is not None:
+        if args.baseline is None:
+            parser.error("--current needs --baseline")
+        current = orjson.loads(args.current.read_bytes())
+    else:
+        current = run(args)
+        body = orjson.dumps(current, option=orjson.OPT_INDENT_2)
+        if args.out is not None:
+            args.out.write_bytes(body)
+        else:
+            sys.stdout.buffer.write(body + b"\n")
+
+    if args.baseline is not None:
+        baseline = orjson.loads(args.baseline.read_bytes())
+        found = regressions(current, baseline, args.tolerance, args.min_delta_ms)
+        for line in found:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if found:
+            sys.exit(1)
+        print(
+            f"no regressions against {baseline.get('commit')} "
+            f"(tolerance {args.tolerance:.0%})",
+            file=sys.stderr,
+        )
@@ -0,0 +1,98 @@
+"""
+Measure GET /foods/ latency on its own and during a burst of concurrent
+logins, to check that password hashing no longer starves other endpoints.
+
+Usage:
+    python -m benchmarks.login_burst --logins 200 --seconds 10
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from collections import Counter
+
+import httpx
+from ulid import ULID
+
+from main import app
+
+PASSWORD = "Bench-passw0rd!"
+
+
+def summarize(latencies: list[float]) -> str:
+    latencies = sorted(latencies)
+    p99 = latencies[max(int(len(latencies) * 0.99) - 1, 0)]
+
+    return (
+        f"{len(latencies)} requests, p50 {statistics.median(latencies) * 1000:.1f} ms, "
+        f"p99 {p99 * 1000:.1f} ms"
+    )
+
+
+async def sample_foods(http: httpx.AsyncClient, seconds: float) -> list[float]:
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        resp = await http.get("/foods/", params={"limit": 20})
+        latencies.append(time.perf_counter() - start)
+        resp.raise_for_status()
+
+    return latencies
+
+
+async def login_loop(
+    http: httpx.AsyncClient, username: str, seconds: float, outcomes: Counter
+):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        resp = await http.post(
+            "/users/login", json={"username": username, "password": PASSWORD}
+        )
+        outcomes[resp.status_code] += 1
+        if resp.status_code == 503:
+            await asyncio.sleep(float(resp.headers.get("Retry-After", "1")))
+
+
+async def main(logins: int, seconds: float):
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        limits = httpx.Limits(max_connections=None)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", limits=limits, timeout=None
+        ) as http:
+            username = f"bench{str(ULID())[-10:].lower()}"
+            resp = await http.post(
+                "/users/register",
+                json={
+                    "username": username,
+                    "email": f"{username}@example.com",
+                    "fullname": "bench",
+                    "password": PASSWORD,
+                },
+            )
+            resp.raise_for_status()
+
+            baseline = await sample_foods(http, seconds)
+
+            outcomes = Counter()
+            burst = [
+                asyncio.create_task(login_loop(http, username, seconds, outcomes))
+                for _ in range(logins)
+            ]
+            during = await sample_foods(http, seconds)
+            await asyncio.gather(*burst)
+
+    print(f"GET /foods/ idle:         {summarize(baseline)}")
+    print(f"GET /foods/ during burst: {summarize(during)}")
+    print(f"logins by status: {dict(outcomes)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.logins, args.seconds))
@@ -0,0 +1,307 @@
+"""
+EXPLAIN every selective query the routers issue and fail if any of them
+sequentially scans a large table. Run it against a seeded database so the
+planner sees realistic statistics:
+
+    python -m benchmarks.plan_check --seed 1000000
+
+Whole-table reads (GET /foods/export, the province rollup behind the top
+level of GET /locations/hierarchy) are scans by design and aren't checked.
+
+Exits with status 1 when a query regresses.
+"""
+
+import argparse
+import sys
+import time
+
+import psycopg
+from psycopg.rows import dict_row
+
+import db
+from api.food.route import FOOD_COLUMNS, _expand_query
+from api.food_stats.query import STATS_QUERIES
+
+# (name, query, params) with params filled in from a sample row, see `samples`.
+QUERIES = [
+    (
+        "foods list",
+        f"SELECT {FOOD_COLUMNS} FROM foods ORDER BY id LIMIT %s",
+        lambda s: [51],
+    ),
+    (
+        "foods list after",
+        f"SELECT {FOOD_COLUMNS} FROM foods WHERE id > %s ORDER BY id LIMIT %s",
+        lambda s: [s["food_id"], 51],
+    ),
+    (
+        "foods list validators",
+        """
+        SELECT count(*) AS count, max(modified_at) AS last_modified,
+               (array_agg(id ORDER BY id))[1] AS first_id,
+               (array_agg(id ORDER BY id DESC))[1] AS last_id
+        FROM (
+            SELECT id, coalesce(updated_at, created_at) AS modified_at
+            FROM foods WHERE (foods.id) > (%s) ORDER BY foods.id LIMIT %s
+        ) AS page
+        """,
+        lambda s: [s["food_id"], 51],
+    ),
+    (
+        "foods by price",
+        f"""
+        SELECT {FOOD_COLUMNS} FROM foods
+        WHERE foods.price >= %s AND (foods.price, foods.id) > (%s, %s)
+        ORDER BY foods.price, foods.id LIMIT %s
+        """,
+        lambda s: [10_000, s["price"], s["food_id"], 51],
+    ),
+    (
+        "foods by price in location",
+        f"""
+        SELECT {FOOD_COLUMNS} FROM foods
+        WHERE foods.location_id = %s AND foods.price >= %s AND foods.price <= %s
+        ORDER BY foods.price, foods.id LIMIT %s
+        """,
+        lambda s: [s["location_id"], 10_000, 20_000, 51],
+    ),
+    (
+        "foods by id",
+        f"SELECT {FOOD_COLUMNS} FROM foods WHERE id = %s",
+        lambda s: [s["food_id"]],
+    ),
+    (
+        "foods list expanded",
+        "SELECT {} FROM foods {} WHERE foods.id > %s ORDER BY foods.id LIMIT %s".format(
+            *_expand_query(["location", "owner"])
+        ),
+        lambda s: [s["food_id"], 51],
+    ),
+    (
+        "foods by id expanded",
+        "SELECT {} FROM foods {} WHERE foods.id = %s".format(
+            *_expand_query(["location", "owner"])
+        ),
+        lambda s: [s["food_id"]],
+    ),
+    (
+        "foods search",
+        f"""
+        SELECT {FOOD_COLUMNS}, ts_rank(search, query) AS rank
+        FROM foods, websearch_to_tsquery('simple', %s) AS query
+        WHERE search @@ query
+        ORDER BY rank DESC, id DESC
+        LIMIT %s
+        """,
+        lambda s: ["terasi kemangi", 51],
+    ),
+    (
+        "foods update",
+        f"""
+        UPDATE foods SET name = %s, updated_at = NOW()
+        WHERE id = %s RETURNING {FOOD_COLUMNS}
+        """,
+        lambda s: ["x", s["food_id"]],
+    ),
+    (
+        "foods delete",
+        "DELETE FROM foods WHERE id = %s RETURNING id",
+        lambda s: [s["food_id"]],
+    ),
+    (
+        "owners food stats",
+        STATS_QUERIES["owners"],
+        lambda s: [s["owner_id"]],
+    ),
+    (
+        "locations food stats",
+        STATS_QUERIES["locations"],
+        lambda s: [s["location_id"]],
+    ),
+    # What the food stats triggers run when a removed food held a min, max or
+    # latest value.
+    (
+        "owners food stats min price",
+        "SELECT min(price) FROM foods WHERE owner_id = %s",
+        lambda s: [s["owner_id"]],
+    ),
+    (
+        "owners food stats latest",
+        "SELECT max(id) FROM foods WHERE owner_id = %s",
+        lambda s: [s["owner_id"]],
+    ),
+    (
+        "locations food stats max price",
+        "SELECT max(price) FROM foods WHERE location_id = %s",
+        lambda s: [s["location_id"]],
+    ),
+    (
+        "locations list after",
+        "SELECT * FROM locations WHERE id > %s ORDER BY id LIMIT %s",
+        lambda s: [s["location_id"], 51],
+    ),
+    (
+        "locations by id",
+        "SELECT * FROM locations WHERE id = %s",
+        lambda s: [s["location_id"]],
+    ),
+    (
+        "locations hierarchy cities",
+        """
+        SELECT NULLIF(city, '') AS name, sum(location_count)::bigint AS count
+        FROM location_hierarchy WHERE province = %s
+        GROUP BY city ORDER BY city
+        """,
+        lambda s: [s["province"]],
+    ),
+    (
+        "locations hierarchy districts",
+        """
+        SELECT NULLIF(district, '') AS name, sum(location_count)::bigint AS count
+        FROM location_hierarchy WHERE province = %s AND city = %s
+        GROUP BY district ORDER BY district
+        """,
+        lambda s: [s["province"], s["city"]],
+    ),
+    (
+        "owners list after",
+        """
+        SELECT id, image, name, created_at, updated_at FROM owners
+        WHERE id > %s ORDER BY id LIMIT %s
+        """,
+        lambda s: [s["owner_id"], 51],
+    ),
+    (
+        "owners by id",
+        "SELECT id, image, name FROM owners WHERE id = %s",
+        lambda s: [s["owner_id"]],
+    ),
+    (
+        "users login",
+        "SELECT id, username, password FROM users WHERE username = %s",
+        lambda s: [s["username"]],
+    ),
+    # The lookups Postgres runs on the referencing table when a referenced row
+    # is deleted or its key changes. They're invisible in the parent's plan.
+    (
+        "fk foods.user_id",
+        "SELECT 1 FROM ONLY foods x WHERE user_id = %s FOR KEY SHARE OF x",
+        lambda s: [s["user_id"]],
+    ),
+    (
+        "fk foods.owner_id",
+        "SELECT 1 FROM ONLY foods x WHERE owner_id = %s FOR KEY SHARE OF x",
+        lambda s: [s["owner_id"]],
+    ),
+    (
+        "fk foods.location_id",
+        "SELECT 1 FROM ONLY foods x WHERE location_id = %s FOR KEY SHARE OF x",
+        lambda s: [s["location_id"]],
+    ),
+    (
+        "fk owner_images.owner_id",
+        "SELECT 1 FROM ONLY owner_images x WHERE owner_id = %s FOR KEY SHARE OF x",
+        lambda s: [s["owner_id"]],
+    ),
+    (
+        "fk food_images.food_id",
+        "SELECT 1 FROM ONLY food_images x WHERE food_id = %s FOR KEY SHARE OF x",
+        lambda s: [s["food_id"]],
+    ),
+]
+
+TRIGRAM_QUERIES = [
+    (
+        "locations search",
+        """
+        SELECT id, district, city, province, postal_code, details,
+               greatest(similarity(district, %s), similarity(city, %s))
+                   AS similarity
+        FROM locations
+        WHERE district %% %s OR city %% %s
+        ORDER BY similarity DESC, id
+        LIMIT %s
+        """,
+        lambda s: [s["city"], s["city"], s["city"], s["city"], 51],
+    ),
+]
+
+
+def samples(cur) -> dict:
+    # The newest food, whose owner and location are typical of freshly seeded
+    # data rather than a hot key a seq scan would rightly be chosen for.
+    cur.execute(
+        """
+        SELECT f.id AS food_id, f.price, f.user_id, f.owner_id, f.location_id,
+               l.province, l.city, u.username
+        FROM foods f
+        JOIN locations l ON l.id = f.location_id
+        JOIN users u ON u.id = f.user_id
+        ORDER BY f.id DESC
+        LIMIT 1
+        """
+    )
+    sample = cur.fetchone()
+    if sample is None:
+        raise SystemExit("seed some foods first: python -m benchmarks.seed")
+
+    return sample
+
+
+def seq_scans(plan: dict) -> list[str]:
+    scans = [plan["Relation Name"]] if plan["Node Type"] == "Seq Scan" else []
+    for child in plan.get("Plans", []):
+        scans += seq_scans(child)
+
+    return scans
+
+
+def main(min_rows: int) -> int:
+    with (
+        psycopg.connect(db.DB_CONNINFO) as conn,
+        conn.cursor(row_factory=dict_row) as cur,
+    ):
+        cur.execute("ANALYZE")
+        cur.execute("SELECT relname, reltuples FROM pg_class WHERE relkind = 'r'")
+        table_rows = {row["relname"]: row["reltuples"] for row in cur.fetchall()}
+
+        cur.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        queries = QUERIES + (TRIGRAM_QUERIES if cur.fetchone() else [])
+
+        sample = samples(cur)
+        failures = 0
+        for name, query, params in queries:
+            cur.execute(f"EXPLAIN (FORMAT JSON) {query}", params(sample))
+            plan = cur.fetchone()["QUERY PLAN"][0]["Plan"]
+            large = [t for t in seq_scans(plan) if table_rows.get(t, 0) >= min_rows]
+            if large:
+                failures += 1
+                print(f"FAIL {name}: seq scan on {', '.join(large)}")
+            else:
+                print(f"ok   {name}")
+        conn.rollback()
+
+    if len(queries) == len(QUERIES):
+        print("skipped the trigram queries, pg_trgm is not installed")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", type=int, default=0, help="foods to seed first")
+    parser.add_argument(
+        "--min-rows",
+        type=int,
+        default=10_000,
+        help="seq scans of tables smaller than this are fine",
+    )
+    args = parser.parse_args()
+
+    if args.seed:
+        from benchmarks.seed import Dataset, seed
+
+        # A fresh dataset seed each time, so repeated runs add rows.
+        seed(Dataset(foods=args.seed, seed=time.time_ns()))
+
+    sys.exit(main(args.min_rows))
@@ -0,0 +1,86 @@
+"""
+Check replica routing: right after a client's PATCH its reads must come from
+the primary, while other clients, and the same client once the window has
+passed, read the replica. A client without a cookie jar that sends back the
+read-primary-until header is pinned the same way, and another client's
+replica read right after the write must not fill the cache.
+
+Needs a replica. A frozen copy of the database on the same server works as an
+infinitely lagging one:
+
+    CREATE DATABASE jejakmakan_replica TEMPLATE jejakmakan;
+    DB_REPLICA_HOST=localhost DB_REPLICA_NAME=jejakmakan_replica \\
+    READ_YOUR_WRITES_SECONDS=2 python -m benchmarks.read_your_writes
+
+Exits with status 1 if the writer, by cookie or by header, doesn't see its
+own write, or if the stale replica read was cached.
+"""
+
+import asyncio
+import sys
+
+import httpx
+from ulid import ULID
+
+import db
+from api.food.route import food_cache
+from api.invalidation import flush_all
+from api.replica import PRIMARY_HEADER, READ_YOUR_WRITES_SECONDS
+from main import app
+
+
+async def main() -> int:
+    if db.read_pool is db.pool:
+        raise SystemExit("set DB_REPLICA_HOST (and DB_REPLICA_NAME) first")
+
+    async with app.router.lifespan_context(app):
+        async with db.pool.connection() as conn:
+            cur = await conn.execute("SELECT id FROM foods ORDER BY id LIMIT 1")
+            (food_id,) = await cur.fetchone()
+
+        transport = httpx.ASGITransport(app=app)
+        async with (
+            httpx.AsyncClient(transport=transport, base_url="http://check") as writer,
+            httpx.AsyncClient(transport=transport, base_url="http://check") as other,
+        ):
+            marker = f"read-your-writes {ULID()}"
+            flush_all()
+            resp = await writer.patch(f"/foods/{food_id}", json={"description": marker})
+            resp.raise_for_status()
+            primary_until = resp.headers[PRIMARY_HEADER]
+
+            async def description(client: httpx.AsyncClient, **kwargs) -> str:
+                resp = await client.get(f"/foods/{food_id}", **kwargs)
+                resp.raise_for_status()
+                return resp.json()["description"]
+
+            # The PATCH invalidated the food, so the other client's replica
+            # read mustn't fill the cache. Pinned reads skip the cache, and
+            # it's cleared before the last one, so each read below shows
+            # where it was routed.
+            others = await description(other)
+            cached = food_cache.get(food_id) is not None
+            own = await description(writer)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://check"
+            ) as c:
+                by_header = await description(
+                    c, headers={PRIMARY_HEADER: primary_until}
+                )
+            await asyncio.sleep(READ_YOUR_WRITES_SECONDS + 1)
+            flush_all()
+            later = await description(writer)
+
+    print(f"writer, within the window:  {'primary' if own == marker else 'STALE'}")
+    print(
+        f"writer, by header:          {'primary' if by_header == marker else 'STALE'}"
+    )
+    print(f"other client:               {'fresh' if others == marker else 'stale'}")
+    print(f"  ... filled the cache:     {'YES' if cached else 'no'}")
+    print(f"writer, after the window:   {'fresh' if later == marker else 'stale'}")
+
+    return 0 if own == marker and by_header == marker and not cached else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,64 @@
+"""
+Bytes per row held by dict_row rows versus the slotted row classes, for each
+row type the routers use. "container" is the row object itself, "total" also
+counts the values it references (measured with tracemalloc, so values shared
+between rows, like the same None, count once).
+
+Usage:
+    python -m benchmarks.row_memory --rows 100000
+"""
+
+import argparse
+import gc
+import sys
+import tracemalloc
+
+import psycopg
+from psycopg.rows import class_row, dict_row
+
+import db
+from api.food.route import FOOD_ROW
+from api.location.route import LOCATION_ROW
+from api.owner.route import OWNER_ROW
+from api.rows import UserRow
+
+ROW_TYPES = [
+    ("foods", FOOD_ROW.select, FOOD_ROW),
+    ("locations", LOCATION_ROW.select, LOCATION_ROW),
+    ("owners", OWNER_ROW.select, OWNER_ROW),
+    ("users", "id, username, password", class_row(UserRow)),
+]
+
+
+def fetch(
+    conn, table: str, columns: str, row_factory, n_rows: int
+) -> tuple[float, float]:
+    with conn.cursor(row_factory=row_factory) as cur:
+        gc.collect()
+        tracemalloc.start()
+        cur.execute(f"SELECT {columns} FROM {table} LIMIT %s", [n_rows])
+        rows = cur.fetchall()
+        total, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    if not rows:
+        return 0.0, 0.0
+
+    return sys.getsizeof(rows[0]), total / len(rows)
+
+
+def main(n_rows: int):
+    print(f"{'table':<10} {'row type':<12} {'container B':>12} {'total B/row':>12}")
+    with psycopg.connect(db.DB_CONNINFO) as conn:
+        for table, columns, slotted in ROW_TYPES:
+            for name, row_factory in (("dict_row", dict_row), ("slotted", slotted)):
+                container, total = fetch(conn, table, columns, row_factory, n_rows)
+                print(f"{table:<10} {name:<12} {container:>12.0f} {total:>12.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    main(args.rows)
@@ -0,0 +1,350 @@
+"""
+Deterministic, parallel COPY seeding for the benchmarks.
+
+Generates users, owners with their owner_images, locations, and foods with
+their food_images. Every row is a pure function of --seed and its index:
+- its ULID timestamp and created_at spread the table evenly over the --days
+  before --until, so ids are time-ordered;
+- the random part of its ULID hashes the seed, table and index, so a child
+  row computes its parent's id without looking it up.
+
+Foods pick owners, locations and users with a power-law skew (--skew). A
+handful of owners and locations get most of the foods, and the hot ones are
+scattered over the id range rather than all being the oldest. Locations form
+a province > city > district hierarchy, and cities are named `city <n>`.
+
+Chunks of --chunk rows are streamed through COPY by --workers processes, each
+committing its own chunk. Parent tables load before their children. The same
+arguments always produce the same dataset, so seed an empty database, or use
+another --seed to add a second, disjoint dataset.
+
+Usage:
+    python -m benchmarks.seed --foods 10000000 --owners 100000 \\
+        --locations 50000 --users 100000 --workers 8
+"""
+
+import argparse
+import hashlib
+import math
+import os
+import random
+import sys
+import time
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+
+import bcrypt
+import psycopg
+
+from api.ulids import encode_ulid
+
+# Small Zipf-ish vocabulary so full-text search terms hit realistic,
+# uneven numbers of rows: early words are common, late words are rare.
+WORDS = [
+    "nasi",
+    "goreng",
+    "ayam",
+    "bakar",
+    "sate",
+    "soto",
+    "mie",
+    "bakso",
+    "rendang",
+    "sambal",
+    "pedas",
+    "manis",
+    "gurih",
+    "kuah",
+    "santan",
+    "tempe",
+    "tahu",
+    "ikan",
+    "udang",
+    "cumi",
+    "sapi",
+    "kambing",
+    "telur",
+    "sayur",
+    "lontong",
+    "ketupat",
+    "gulai",
+    "opor",
+    "pecel",
+    "gado",
+    "rawon",
+    "tongseng",
+    "martabak",
+    "serabi",
+    "klepon",
+    "cendol",
+    "dawet",
+    "kopi",
+    "teh",
+    "jahe",
+    "kunyit",
+    "kemangi",
+    "lengkuas",
+    "terasi",
+    "kecap",
+]
+WEIGHTS = [1 / (rank + 1) for rank in range(len(WORDS))]
+
+
+PROVINCES = [
+    "Jawa Barat",
+    "Jawa Timur",
+    "Jawa Tengah",
+    "DKI Jakarta",
+    "Banten",
+    "DI Yogyakarta",
+    "Bali",
+    "Sumatera Utara",
+    "Sumatera Barat",
+    "Sulawesi Selatan",
+]
+# Most owners and foods have a few images, some have up to MAX_IMAGES.
+MAX_IMAGES = 16
+
+
+@dataclass(frozen=True)
+class Dataset:
+    users: int = 1_000
+    owners: int = 10_000
+    locations: int = 10_000
+    foods: int = 1_000_000
+    # Mean images per owner and per food.
+    owner_images: float = 2.0
+    food_images: float = 1.0
+    # The top `1 / 10 ** skew` of parents get roughly 10% of the children.
+    skew: float = 3.0
+    seed: int = 0
+    until: datetime = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    days: int = 365
+    password: str = "Seed-pass1"
+
+    def count(self, table: str) -> int:
+        if table in ("owner_images", "food_images"):
+            # Image rows are generated per parent, so they're chunked by parent.
+            return getattr(self, table.removesuffix("_images") + "s")
+        return getattr(self, table)
+
+
+TABLES = {
+    "users": "users (id, username, email, password, created_at)",
+    "owners": "owners (id, image, name, created_at)",
+    "locations": (
+        "locations (id, district, city, province, postal_code, details, created_at)"
+    ),
+    "foods": (
+        "foods (id, user_id, owner_id, location_id, image, name, description, "
+        "price, review, created_at)"
+    ),
+    "owner_images": "owner_images (id, owner_id, created_at)",
+    "food_images": "food_images (id, food_id, images, created_at)",
+}
+# Tables in one stage only reference tables of earlier stages.
+STAGES = [("users", "owners", "locations"), ("foods", "owner_images"), ("food_images",)]
+
+
+def created_ms(ds: Dataset, table: str, index: int) -> int:
+    """Milliseconds since the epoch of row `index`, evenly spaced over the window."""
+    until = int(ds.until.timestamp() * 1_000)
+    span = ds.days * 86_400_000
+    return until - span + index * span // max(ds.count(table), 1)
+
+
+def make_id(ds: Dataset, ms: int, key: str) -> str:
+    """A ULID at `ms` whose random part is a hash of the seed and `key`."""
+    digest = hashlib.blake2b(f"{ds.seed}:{key}".encode(), digest_size=10).digest()
+
+    return encode_ulid(ms << 80 | int.from_bytes(digest, "big"))
+
+
+def row_id(ds: Dataset, table: str, index: int) -> str:
+    return make_id(ds, created_ms(ds, table, index), f"{table}:{index}")
+
+
+# Foods and images look their parents up by index, hot parents over and over.
+parent_id = lru_cache(maxsize=1 << 18)(row_id)
+
+
+@lru_cache
+def stride(n: int) -> int:
+    """A step coprime with `n`, so `rank * stride % n` permutes 0 .. n-1."""
+    step = 1_000_003
+    while math.gcd(step, n) != 1:
+        step += 2
+    return step
+
+
+def popular(rng: random.Random, n: int, skew: float) -> int:
+    """A power-law distributed index below `n`, hot indexes scattered."""
+    rank = int(n * rng.random() ** skew)
+    return rank * stride(n) % n
+
+
+def image_count(rng: random.Random, mean: float) -> int:
+    return min(int(rng.expovariate(1 / mean)), MAX_IMAGES) if mean > 0 else 0
+
+
+def words(rng: random.Random, k: int) -> str:
+    return " ".join(rng.choices(WORDS, WEIGHTS, k=k))
+
+
+def username(ds: Dataset, index: int) -> str:
+    return f"seed-{ds.seed}-{index}"
+
+
+def rows(ds: Dataset, table: str, lo: int, hi: int, hashed: str) -> Iterator[tuple]:
+    """Rows `lo` .. `hi - 1` of `table`, or of the parents of an images table."""
+    rng = random.Random(f"{ds.seed}:{table}:{lo}")
+    n_cities = max(ds.locations // 10, 1)
+
+    for i in range(lo, hi):
+        ms = created_ms(ds, table, i)
+        id = make_id(ds, ms, f"{table}:{i}")
+        at = datetime.fromtimestamp(ms / 1_000, timezone.utc)
+        if table == "users":
+            name = username(ds, i)
+            yield id, name, f"{name}@seed.local", hashed, at
+        elif table == "owners":
+            yield id, f"owners/{id}.jpg", words(rng, 2), at
+        elif table == "locations":
+            city = popular(rng, n_cities, ds.skew)
+            district = rng.randrange(50)
+            yield (
+                id,
+                f"district {city}-{district}",
+                f"city {city}",
+                PROVINCES[city % len(PROVINCES)],
+                f"{10_000 + city * 50 + district}",
+                words(rng, 3),
+                at,
+            )
+        elif table == "foods":
+            yield (
+                id,
+                parent_id(ds, "users", popular(rng, ds.users, ds.skew)),
+                parent_id(ds, "owners", popular(rng, ds.owners, ds.skew)),
+                parent_id(ds, "locations", popular(rng, ds.locations, ds.skew)),
+                f"foods/{id}.jpg",
+                words(rng, 2),
+                words(rng, 8),
+                max(round(rng.lognormvariate(10, 0.6) / 500) * 500, 1_000),
+                words(rng, 5),
+                at,
+            )
+        elif table == "owner_images":
+            owner = row_id(ds, "owners", i)
+            for j in range(image_count(rng, ds.owner_images)):
+                yield make_id(ds, ms, f"{table}:{i}:{j}"), owner, at
+        elif table == "food_images":
+            food = row_id(ds, "foods", i)
+            for j in range(image_count(rng, ds.food_images)):
+                image = make_id(ds, ms, f"{table}:{i}:{j}")
+                yield image, food, image, at
+
+
+def load(conninfo: str, ds: Dataset, table: str, lo: int, hi: int, hashed: str) -> int:
+    """COPY one chunk of `table` in its own transaction; the rows written."""
+    n = 0
+    with (
+        psycopg.connect(conninfo) as conn,
+        conn.cursor() as cur,
+        cur.copy(f"COPY {TABLES[table]} FROM STDIN") as copy,
+    ):
+        for row in rows(ds, table, lo, hi, hashed):
+            copy.write_row(row)
+            n += 1
+
+    return n
+
+
+def seed(
+    ds: Dataset,
+    conninfo: str | None = None,
+    workers: int | None = None,
+    chunk: int = 100_000,
+) -> dict[str, int]:
+    """Load `ds` stage by stage; rows written per table."""
+    if ds.foods and not (ds.users and ds.owners and ds.locations):
+        raise ValueError("foods need at least one user, owner and location")
+    if conninfo is None:
+        import db
+
+        conninfo = db.DB_CONNINFO
+    hashed = bcrypt.hashpw(ds.password.encode(), bcrypt.gensalt()).decode()
+
+    written = {}
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        for stage in STAGES:
+            start = time.perf_counter()
+            futures = {
+                table: [
+                    executor.submit(
+                        load,
+                        conninfo,
+                        ds,
+                        table,
+                        lo,
+                        min(lo + chunk, ds.count(table)),
+                        hashed,
+                    )
+                    for lo in range(0, ds.count(table), chunk)
+                ]
+                for table in stage
+            }
+            for table, table_futures in futures.items():
+                written[table] = sum(future.result() for future in table_futures)
+            elapsed = time.perf_counter() - start
+            print(
+                ", ".join(f"{written[table]:,} {table}" for table in stage)
+                + f" in {elapsed:.1f} s",
+                file=sys.stderr,
+            )
+
+    with psycopg.connect(conninfo, autocommit=True) as conn:
+        for table in TABLES:
+            conn.execute(f"ANALYZE {table}")
+
+    return written
+
+
+if __name__ == "__main__":
+    defaults = Dataset()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=defaults.users)
+    parser.add_argument("--owners", type=int, default=defaults.owners)
+    parser.add_argument("--locations", type=int, default=defaults.locations)
+    parser.add_argument("--foods", type=int, default=defaults.foods)
+    parser.add_argument("--owner-images", type=float, default=defaults.owner_images)
+    parser.add_argument("--food-images", type=float, default=defaults.food_images)
+    parser.add_argument("--skew", type=float, default=defaults.skew)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--until", type=datetime.fromisoformat, default=defaults.until)
+    parser.add_argument("--days", type=int, default=defaults.days)
+    parser.add_argument("--password", default=defaults.password)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk", type=int, default=100_000, help="rows per COPY")
+    args = parser.parse_args()
+
+    seed(
+        Dataset(
+            users=args.users,
+            owners=args.owners,
+            locations=args.locations,
+            foods=args.foods,
+            owner_images=args.owner_images,
+            food_images=args.food_images,
+            skew=args.skew,
+            seed=args.seed,
+            until=args.until,
+            days=args.days,
+            password=args.password,
+        ),
+        workers=args.workers,
+        chunk=args.chunk,
+    )
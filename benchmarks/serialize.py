@@ -0,0 +1,63 @@
+"""
+Fetch and serialize a page of 10k foods the old way (dict_row rows through
+jsonable_encoder into ORJSONResponse) and through the FOOD_ROW layout straight
+into ORJSONResponse.
+
+Usage:
+    python -m benchmarks.serialize --rows 10000 --rounds 20
+"""
+
+import argparse
+import statistics
+import time
+
+import psycopg
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
+from psycopg.rows import dict_row
+
+import db
+from api.food.route import FOOD_COLUMNS, FOOD_ROW
+
+
+def measure(conn, row_factory, encode, n_rows: int, rounds: int):
+    query = f"SELECT {FOOD_COLUMNS} FROM foods ORDER BY id LIMIT %s"
+    fetch, serialize = [], []
+    for _ in range(rounds):
+        with conn.cursor(row_factory=row_factory) as cur:
+            start = time.perf_counter()
+            cur.execute(query, [n_rows], prepare=True)
+            rows = cur.fetchall()
+            fetched = time.perf_counter()
+            body = ORJSONResponse(
+                content={"count": len(rows), "data": encode(rows)}
+            ).body
+            done = time.perf_counter()
+        fetch.append((fetched - start) * 1_000)
+        serialize.append((done - fetched) * 1_000)
+
+    return statistics.median(fetch), statistics.median(serialize), body
+
+
+def main(n_rows: int, rounds: int):
+    with psycopg.connect(db.DB_CONNINFO) as conn:
+        old = measure(conn, dict_row, jsonable_encoder, n_rows, rounds)
+        new = measure(conn, FOOD_ROW, lambda rows: rows, n_rows, rounds)
+
+    if old[2] != new[2]:
+        raise AssertionError("the two paths produced different JSON")
+
+    for name, (fetch, serialize, _) in (("old", old), ("new", new)):
+        print(
+            f"{name}: fetch {fetch:7.2f} ms  serialize {serialize:7.2f} ms  "
+            f"total {fetch + serialize:7.2f} ms for {n_rows} foods"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    main(args.rows, args.rounds)
@@ -0,0 +1,142 @@
+"""
+Check request coalescing: N concurrent GET /foods/{id} for a food that isn't
+cached must check out one connection and run one query between them, and
+every one of them must get the same body.
+
+    python -m benchmarks.single_flight --requests 200
+
+Runs the burst with the foods flight enabled and then disabled, for the
+connection count and latency of each. Then it holds a burst's shared load
+after it has read the food, PATCHes the food, and checks the next GET sees
+the new description rather than the held load's fill. It puts the original
+description back afterwards.
+
+Exits with status 1 unless the enabled burst ran exactly one query and the
+GET after the PATCH is fresh.
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+import httpx
+from ulid import ULID
+
+import db
+from api.food.route import food_flight
+from api.invalidation import flush_all
+from api.metrics import pool_checkout_seconds
+from main import app
+
+
+async def burst(client: httpx.AsyncClient, food_id: str, n: int) -> dict:
+    """Fire `n` identical reads at once, after emptying the caches."""
+    flush_all()
+    checkouts_before, _ = pool_checkout_seconds.totals(db.read_pool.name)
+    loads_before, shared_before = food_flight.loads, food_flight.shared
+
+    async def read() -> tuple[float, bytes]:
+        start = time.perf_counter()
+        resp = await client.get(f"/foods/{food_id}")
+        resp.raise_for_status()
+        return time.perf_counter() - start, resp.content
+
+    results = await asyncio.gather(*(read() for _ in range(n)))
+    checkouts_after, _ = pool_checkout_seconds.totals(db.read_pool.name)
+    latencies = sorted(seconds * 1000 for seconds, _ in results)
+
+    return {
+        "queries": checkouts_after - checkouts_before,
+        "loads": food_flight.loads - loads_before,
+        "shared": food_flight.shared - shared_before,
+        "bodies": len({body for _, body in results}),
+        "p50": statistics.median(latencies),
+        "max": latencies[-1],
+    }
+
+
+async def write_during_load(client: httpx.AsyncClient, food_id: str, n: int) -> bool:
+    """
+    Whether a GET after a PATCH that committed while a coalesced load was
+    between its query and its cache fill returns the new description.
+    """
+    resp = await client.get(f"/foods/{food_id}")
+    resp.raise_for_status()
+    description = resp.json()["description"]
+
+    flush_all()
+    read_pool = db.read_pool
+    read = asyncio.Event()
+    release = asyncio.Event()
+
+    # The load's connection goes back to the pool after its query and before
+    # it fills the cache, so holding the first putconn holds the load there.
+    async def held_putconn(conn) -> None:
+        del read_pool.putconn  # back to the pool's own putconn
+        read.set()
+        await release.wait()
+        await read_pool.putconn(conn)
+
+    read_pool.putconn = held_putconn
+    reads = [asyncio.create_task(client.get(f"/foods/{food_id}")) for _ in range(n)]
+    await read.wait()
+
+    marker = f"single-flight {ULID()}"
+    resp = await client.patch(f"/foods/{food_id}", json={"description": marker})
+    resp.raise_for_status()
+
+    release.set()
+    await asyncio.gather(*reads)
+    after = await client.get(f"/foods/{food_id}")
+    after.raise_for_status()
+
+    resp = await client.patch(f"/foods/{food_id}", json={"description": description})
+    resp.raise_for_status()
+
+    return after.json()["description"] == marker
+
+
+async def main(n: int) -> int:
+    async with app.router.lifespan_context(app):
+        async with db.pool.connection() as conn:
+            cur = await conn.execute("SELECT id FROM foods ORDER BY id LIMIT 1")
+            (food_id,) = await cur.fetchone()
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://check") as c:
+            food_flight.enabled = True
+            coalesced = await burst(c, food_id, n)
+            food_flight.enabled = False
+            uncoalesced = await burst(c, food_id, n)
+            food_flight.enabled = True
+            fresh = await write_during_load(c, food_id, n)
+
+    for name, result in (("coalesced", coalesced), ("uncoalesced", uncoalesced)):
+        print(
+            f"{name:<12} {n} requests -> {result['queries']} queries, "
+            f"{result['loads']} loads, {result['shared']} shared, "
+            f"{result['bodies']} distinct bodies, "
+            f"p50 {result['p50']:.1f} ms, max {result['max']:.1f} ms"
+        )
+
+    print(f"GET after a PATCH during a shared load: {'fresh' if fresh else 'STALE'}")
+
+    ok = (
+        coalesced["queries"] == 1
+        and coalesced["loads"] == 1
+        and coalesced["shared"] == n - 1
+        and coalesced["bodies"] == 1
+        and fresh
+    )
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200, help="burst size")
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(main(args.requests)))
@@ -1,7 +1,9 @@
 import os
 
 from dotenv import load_dotenv
-from psycopg_pool import ConnectionPool
+
+from api.metrics import InstrumentedPool
+from api.timing import use_timed_cursors
 
 load_dotenv()
 DB_HOST = os.getenv("DB_HOST")
@@ -11,9 +13,36 @@ DB_NAME = os.getenv("DB_NAME")
 DB_PORT = os.getenv("DB_PORT")
 DB_SSLMODE = os.getenv("DB_SSLMODE")
 
-pool = ConnectionPool(
-    conninfo=f"host={DB_HOST} port={DB_PORT} dbname={DB_NAME} user={DB_USER} password={DB_PASSWORD} sslmode={DB_SSLMODE}",
+DB_CONNINFO = f"host={DB_HOST} port={DB_PORT} dbname={DB_NAME} user={DB_USER} password={DB_PASSWORD} sslmode={DB_SSLMODE}"
+
+# Opened and closed by the app lifespan in main.py, so the pool binds to the
+# event loop that serves requests.
+pool = InstrumentedPool(
+    conninfo=DB_CONNINFO,
+    name="primary",
+    configure=use_timed_cursors,
     min_size=3,
     max_size=10,
     num_workers=9,
+    open=False,
 )
+
+# Optional streaming replica for reads. It shares the primary's credentials;
+# DB_REPLICA_PORT and DB_REPLICA_NAME default to the primary's.
+DB_REPLICA_HOST = os.getenv("DB_REPLICA_HOST")
+DB_REPLICA_PORT = os.getenv("DB_REPLICA_PORT", DB_PORT)
+DB_REPLICA_NAME = os.getenv("DB_REPLICA_NAME", DB_NAME)
+
+if DB_REPLICA_HOST:
+    DB_REPLICA_CONNINFO = f"host={DB_REPLICA_HOST} port={DB_REPLICA_PORT} dbname={DB_REPLICA_NAME} user={DB_USER} password={DB_PASSWORD} sslmode={DB_SSLMODE}"
+    read_pool = InstrumentedPool(
+        conninfo=DB_REPLICA_CONNINFO,
+        name="replica",
+        configure=use_timed_cursors,
+        min_size=3,
+        max_size=10,
+        num_workers=9,
+        open=False,
+    )
+else:
+    read_pool = pool
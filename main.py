@@ -1,27 +1,52 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI, Request, status
 from fastapi.encoders import jsonable_encoder
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from scalar_fastapi import get_scalar_api_reference
 
+from api.cache import caches
 from api.food.route import food_router
+from api.invalidation import listen_for_invalidations
 from api.location.route import location_router
+from api.metrics import CONTENT_TYPE, MetricsMiddleware, render
 from api.owner.route import owner_router
+from api.replica import ReadYourWritesMiddleware
+from api.singleflight import flights
+from api.timing import ServerTimingMiddleware
+from api.updates import update_builders
+from api.user.password import close_password_pool, open_password_pool
 from api.user.route import user_router
-from db import pool
-
-app = FastAPI(summary="Kumande App", description="Kumande App")
+from db import pool, read_pool
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await pool.open()
+    if read_pool is not pool:
+        await read_pool.open()
+    open_password_pool()
+    listener = asyncio.create_task(listen_for_invalidations())
+
+    try:
+        yield
+    finally:
+        listener.cancel()
+        with suppress(asyncio.CancelledError):
+            await listener
+        await close_password_pool()
+        if read_pool is not pool:
+            await read_pool.close()
+        await pool.close()
 
-    yield
 
-    await pool.close()
+app = FastAPI(summary="Kumande App", description="Kumande App", lifespan=lifespan)
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(ServerTimingMiddleware)
+# Outermost, so request latency covers the other middleware too.
+app.add_middleware(MetricsMiddleware)
 
 
 @app.exception_handler(RequestValidationError)
@@ -41,6 +66,26 @@ async def scalar_html():
     )
 
 
+@app.get("/cache/stats", include_in_schema=False)
+async def cache_stats():
+    return {name: cache.stats() for name, cache in caches.items()}
+
+
+@app.get("/singleflight/stats", include_in_schema=False)
+async def singleflight_stats():
+    return {name: flight.stats() for name, flight in flights.items()}
+
+
+@app.get("/updates/stats", include_in_schema=False)
+async def update_stats():
+    return {table: builder.stats() for table, builder in update_builders.items()}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(render(), media_type=CONTENT_TYPE)
+
+
 app.include_router(user_router)
 app.include_router(location_router)
 app.include_router(owner_router)
@@ -0,0 +1,57 @@
+"""
+notify entity changes
+"""
+
+from yoyo import step
+
+__depends__ = {"20251129_01_t0mL7-init"}
+
+steps = [
+    step(
+        """
+        CREATE FUNCTION notify_entity_change() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                PERFORM pg_notify('entity_changes', TG_TABLE_NAME || ':' || OLD.id);
+            ELSE
+                PERFORM pg_notify('entity_changes', TG_TABLE_NAME || ':' || NEW.id);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        """,
+        """
+        DROP FUNCTION notify_entity_change();
+        """,
+    ),
+    step(
+        """
+        CREATE TRIGGER foods_notify_change
+        AFTER UPDATE OR DELETE ON foods
+        FOR EACH ROW EXECUTE FUNCTION notify_entity_change();
+        """,
+        """
+        DROP TRIGGER foods_notify_change ON foods;
+        """,
+    ),
+    step(
+        """
+        CREATE TRIGGER locations_notify_change
+        AFTER UPDATE OR DELETE ON locations
+        FOR EACH ROW EXECUTE FUNCTION notify_entity_change();
+        """,
+        """
+        DROP TRIGGER locations_notify_change ON locations;
+        """,
+    ),
+    step(
+        """
+        CREATE TRIGGER owners_notify_change
+        AFTER UPDATE OR DELETE ON owners
+        FOR EACH ROW EXECUTE FUNCTION notify_entity_change();
+        """,
+        """
+        DROP TRIGGER owners_notify_change ON owners;
+        """,
+    ),
+]
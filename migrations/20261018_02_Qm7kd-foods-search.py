@@ -0,0 +1,160 @@
+"""
+foods search
+
+A `search` tsvector over name, description and review, weighted A to C, with a
+GIN index for /foods/search, added without holding a long lock on foods:
+- the column is added without a default, a catalog-only change, and a
+  trigger fills it on inserts and on updates of the three columns;
+- existing rows are backfilled in committed batches of BATCH_SIZE, with
+  foods_notify_change limited to the API's columns meanwhile so the backfill
+  doesn't NOTIFY every row;
+- the index is built CONCURRENTLY, so writes go on while it builds.
+"""
+
+import time
+
+from psycopg.errors import LockNotAvailable
+from yoyo import step
+
+__depends__ = {"20261018_01_1fQyh-notify-entity-changes"}
+
+# The backfill commits between batches and CREATE INDEX CONCURRENTLY can't run
+# inside a transaction block.
+__transactional__ = False
+
+BATCH_SIZE = 10_000
+LOCK_TIMEOUT = "2s"
+SWAP_ATTEMPTS = 30
+
+NOTIFY_TRIGGER = """
+    CREATE TRIGGER foods_notify_change
+    AFTER UPDATE OR DELETE ON foods
+    FOR EACH ROW EXECUTE FUNCTION notify_entity_change();
+"""
+
+NOTIFY_TRIGGER_API_COLUMNS = """
+    CREATE TRIGGER foods_notify_change
+    AFTER UPDATE OF id, user_id, owner_id, location_id, image, name,
+                    description, price, review, created_at, updated_at
+    OR DELETE ON foods
+    FOR EACH ROW EXECUTE FUNCTION notify_entity_change();
+"""
+
+
+def in_transaction(*statements: str):
+    """
+    A step running `statements` in one transaction, so a failure leaves
+    nothing half done, retried while it can't get its locks in LOCK_TIMEOUT.
+    """
+
+    def run(conn):
+        for attempt in range(SWAP_ATTEMPTS):
+            try:
+                with conn.transaction():
+                    conn.execute(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'")
+                    for statement in statements:
+                        conn.execute(statement)
+                return
+            except LockNotAvailable:
+                if attempt == SWAP_ATTEMPTS - 1:
+                    raise
+                time.sleep(1)
+
+    return run
+
+
+steps = [
+    step(
+        """
+        CREATE FUNCTION food_search_vector(name text, description text, review text)
+        RETURNS tsvector AS $$
+            SELECT setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+                   setweight(to_tsvector('simple', coalesce(description, '')), 'B') ||
+                   setweight(to_tsvector('simple', coalesce(review, '')), 'C');
+        $$ LANGUAGE sql IMMUTABLE;
+        """,
+        """
+        DROP FUNCTION food_search_vector(text, text, text);
+        """,
+    ),
+    step(
+        """
+        CREATE FUNCTION sync_food_search() RETURNS trigger AS $$
+        BEGIN
+            NEW.search := food_search_vector(NEW.name, NEW.description, NEW.review);
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+        """,
+        """
+        DROP FUNCTION sync_food_search();
+        """,
+    ),
+    step(
+        in_transaction(
+            "ALTER TABLE foods ADD COLUMN search tsvector",
+            """
+            CREATE TRIGGER foods_sync_search
+            BEFORE INSERT OR UPDATE OF name, description, review ON foods
+            FOR EACH ROW EXECUTE FUNCTION sync_food_search()
+            """,
+        ),
+        in_transaction(
+            "DROP TRIGGER foods_sync_search ON foods",
+            "ALTER TABLE foods DROP COLUMN search",
+        ),
+    ),
+    step(
+        in_transaction(
+            "DROP TRIGGER foods_notify_change ON foods", NOTIFY_TRIGGER_API_COLUMNS
+        ),
+        in_transaction("DROP TRIGGER foods_notify_change ON foods", NOTIFY_TRIGGER),
+    ),
+    step(
+        f"""
+        DO $$
+        DECLARE
+            last_id varchar := '';
+        BEGIN
+            LOOP
+                WITH batch AS (
+                    SELECT id FROM foods WHERE id > last_id
+                    ORDER BY id LIMIT {BATCH_SIZE}
+                ), updated AS (
+                    UPDATE foods
+                    SET search = food_search_vector(
+                        foods.name, foods.description, foods.review
+                    )
+                    FROM batch
+                    WHERE foods.id = batch.id AND foods.search IS NULL
+                )
+                SELECT max(id) INTO last_id FROM batch;
+                EXIT WHEN last_id IS NULL;
+                COMMIT;
+            END LOOP;
+        END
+        $$;
+        """,
+    ),
+    step(
+        in_transaction("DROP TRIGGER foods_notify_change ON foods", NOTIFY_TRIGGER),
+        in_transaction(
+            "DROP TRIGGER foods_notify_change ON foods", NOTIFY_TRIGGER_API_COLUMNS
+        ),
+    ),
+    step(
+        # The backfill left a dead version of every row behind.
+        """
+        VACUUM (ANALYZE) foods;
+        """,
+    ),
+    step(
+        """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS foods_search_idx
+        ON foods USING GIN (search);
+        """,
+        """
+        DROP INDEX CONCURRENTLY IF EXISTS foods_search_idx;
+        """,
+    ),
+]
@@ -0,0 +1,84 @@
+"""
+location hierarchy
+"""
+
+from yoyo import step
+
+__depends__ = {"20261018_02_Qm7kd-foods-search"}
+
+steps = [
+    step(
+        """
+        CREATE TABLE location_hierarchy (
+            province VARCHAR(255) NOT NULL,
+            city VARCHAR(255) NOT NULL,
+            district VARCHAR(255) NOT NULL,
+            location_count BIGINT NOT NULL,
+            PRIMARY KEY (province, city, district)
+        );
+        """,
+        """
+        DROP TABLE location_hierarchy;
+        """,
+    ),
+    step(
+        """
+        CREATE FUNCTION count_location_hierarchy() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                UPDATE location_hierarchy
+                SET location_count = location_count - 1
+                WHERE province = COALESCE(OLD.province, '')
+                  AND city = COALESCE(OLD.city, '')
+                  AND district = COALESCE(OLD.district, '');
+
+                DELETE FROM location_hierarchy
+                WHERE province = COALESCE(OLD.province, '')
+                  AND city = COALESCE(OLD.city, '')
+                  AND district = COALESCE(OLD.district, '')
+                  AND location_count <= 0;
+            END IF;
+
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO location_hierarchy
+                VALUES (
+                    COALESCE(NEW.province, ''),
+                    COALESCE(NEW.city, ''),
+                    COALESCE(NEW.district, ''),
+                    1
+                )
+                ON CONFLICT (province, city, district) DO UPDATE
+                SET location_count = location_hierarchy.location_count + 1;
+            END IF;
+
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        """,
+        """
+        DROP FUNCTION count_location_hierarchy();
+        """,
+    ),
+    step(
+        """
+        CREATE TRIGGER locations_count_hierarchy
+        AFTER INSERT OR DELETE OR UPDATE OF province, city, district ON locations
+        FOR EACH ROW EXECUTE FUNCTION count_location_hierarchy();
+        """,
+        """
+        DROP TRIGGER locations_count_hierarchy ON locations;
+        """,
+    ),
+    step(
+        """
+        INSERT INTO location_hierarchy
+        SELECT COALESCE(province, ''), COALESCE(city, ''), COALESCE(district, ''),
+               count(*)
+        FROM locations
+        GROUP BY 1, 2, 3;
+        """,
+        """
+        DELETE FROM location_hierarchy;
+        """,
+    ),
+]
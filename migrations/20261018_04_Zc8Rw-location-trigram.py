@@ -0,0 +1,58 @@
+"""
+location trigram
+
+pg_trgm may already be installed for something else. The migration only
+creates it when it's missing, marking it with CREATED_BY as its comment, and
+the rollback only drops an extension carrying that mark.
+"""
+
+from yoyo import step
+
+__depends__ = {"20261018_03_Hv2pL-location-hierarchy"}
+
+CREATED_BY = "created by migration 20261018_04_Zc8Rw-location-trigram"
+
+steps = [
+    step(
+        f"""
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT FROM pg_extension WHERE extname = 'pg_trgm') THEN
+                CREATE EXTENSION pg_trgm;
+                COMMENT ON EXTENSION pg_trgm IS '{CREATED_BY}';
+            END IF;
+        END
+        $$;
+        """,
+        f"""
+        DO $$
+        BEGIN
+            IF obj_description(
+                (SELECT oid FROM pg_extension WHERE extname = 'pg_trgm'),
+                'pg_extension'
+            ) = '{CREATED_BY}' THEN
+                DROP EXTENSION pg_trgm;
+            END IF;
+        END
+        $$;
+        """,
+    ),
+    step(
+        """
+        CREATE INDEX locations_district_trgm_idx
+        ON locations USING GIN (district gin_trgm_ops);
+        """,
+        """
+        DROP INDEX locations_district_trgm_idx;
+        """,
+    ),
+    step(
+        """
+        CREATE INDEX locations_city_trgm_idx
+        ON locations USING GIN (city gin_trgm_ops);
+        """,
+        """
+        DROP INDEX locations_city_trgm_idx;
+        """,
+    ),
+]
@@ -0,0 +1,58 @@
+"""
+foreign key indexes
+"""
+
+from yoyo import step
+
+__depends__ = {"20261018_04_Zc8Rw-location-trigram"}
+
+# CREATE INDEX CONCURRENTLY can't run inside a transaction block.
+__transactional__ = False
+
+steps = [
+    step(
+        """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS foods_user_id_idx
+        ON foods (user_id);
+        """,
+        """
+        DROP INDEX CONCURRENTLY IF EXISTS foods_user_id_idx;
+        """,
+    ),
+    step(
+        """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS foods_owner_id_idx
+        ON foods (owner_id);
+        """,
+        """
+        DROP INDEX CONCURRENTLY IF EXISTS foods_owner_id_idx;
+        """,
+    ),
+    step(
+        """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS foods_location_id_idx
+        ON foods (location_id);
+        """,
+        """
+        DROP INDEX CONCURRENTLY IF EXISTS foods_location_id_idx;
+        """,
+    ),
+    step(
+        """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS owner_images_owner_id_idx
+        ON owner_images (owner_id);
+        """,
+        """
+        DROP INDEX CONCURRENTLY IF EXISTS owner_images_owner_id_idx;
+        """,
+    ),
+    step(
+        """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS food_images_food_id_idx
+        ON food_images (food_id);
+        """,
+        """
+        DROP INDEX CONCURRENTLY IF EXISTS food_images_food_id_idx;
+        """,
+    ),
+]
@@ -0,0 +1,214 @@
+"""
+food price integer
+
+Converts foods.price from VARCHAR to integer without holding a long lock:
+- a new price_int column is kept in sync by a trigger for new writes, and
+  existing rows are backfilled in committed batches of BATCH_SIZE;
+- a NOT VALID check is validated, which only takes a SHARE UPDATE EXCLUSIVE
+  lock, so SET NOT NULL can skip its own table scan;
+- the swap is a catalog-only change in one short transaction, retried when
+  lock_timeout expires rather than queueing in front of every other query.
+
+While the backfill runs, foods_notify_change only fires for the columns the
+API writes, so the backfill doesn't NOTIFY every row.
+
+Then (price, id) and (location_id, price, id) indexes serve ?sort=price and
+?min_price/?max_price, the latter replacing foods_location_id_idx for the
+foreign key lookups.
+
+Rolling back past the swap rewrites the table under an ACCESS EXCLUSIVE lock.
+"""
+
+import time
+
+from psycopg.errors import LockNotAvailable
+from yoyo import step
+
+__depends__ = {"20261018_05_Tb4Nx-foreign-key-indexes"}
+
+# The backfill commits between batches and CREATE INDEX CONCURRENTLY can't run
+# inside a transaction block.
+__transactional__ = False
+
+BATCH_SIZE = 10_000
+LOCK_TIMEOUT = "2s"
+SWAP_ATTEMPTS = 30
+
+SYNC_FUNCTION = """
+    CREATE FUNCTION sync_food_price() RETURNS trigger AS $$
+    BEGIN
+        NEW.price_int := NEW.price::integer;
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+"""
+
+SYNC_TRIGGER = """
+    CREATE TRIGGER foods_sync_price
+    BEFORE INSERT OR UPDATE OF price ON foods
+    FOR EACH ROW EXECUTE FUNCTION sync_food_price();
+"""
+
+NOTIFY_TRIGGER = """
+    CREATE TRIGGER foods_notify_change
+    AFTER UPDATE OR DELETE ON foods
+    FOR EACH ROW EXECUTE FUNCTION notify_entity_change();
+"""
+
+NOTIFY_TRIGGER_API_COLUMNS = """
+    CREATE TRIGGER foods_notify_change
+    AFTER UPDATE OF id, user_id, owner_id, location_id, image, name,
+                    description, price, review, created_at, updated_at
+    OR DELETE ON foods
+    FOR EACH ROW EXECUTE FUNCTION notify_entity_change();
+"""
+
+
+def in_transaction(*statements: str):
+    """
+    A step running `statements` in one transaction, so a failure leaves
+    nothing half done, retried while it can't get its locks in LOCK_TIMEOUT.
+    """
+
+    def run(conn):
+        for attempt in range(SWAP_ATTEMPTS):
+            try:
+                with conn.transaction():
+                    conn.execute(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'")
+                    for statement in statements:
+                        conn.execute(statement)
+                return
+            except LockNotAvailable:
+                if attempt == SWAP_ATTEMPTS - 1:
+                    raise
+                time.sleep(1)
+
+    return run
+
+
+steps = [
+    step(
+        """
+        ALTER TABLE foods ADD COLUMN price_int integer;
+        """,
+        """
+        ALTER TABLE foods DROP COLUMN price_int;
+        """,
+    ),
+    step(
+        SYNC_FUNCTION,
+        """
+        DROP FUNCTION sync_food_price();
+        """,
+    ),
+    step(
+        SYNC_TRIGGER,
+        """
+        DROP TRIGGER foods_sync_price ON foods;
+        """,
+    ),
+    step(
+        in_transaction(
+            "DROP TRIGGER foods_notify_change ON foods", NOTIFY_TRIGGER_API_COLUMNS
+        ),
+        in_transaction("DROP TRIGGER foods_notify_change ON foods", NOTIFY_TRIGGER),
+    ),
+    step(
+        f"""
+        DO $$
+        DECLARE
+            last_id varchar := '';
+        BEGIN
+            LOOP
+                WITH batch AS (
+                    SELECT id FROM foods WHERE id > last_id
+                    ORDER BY id LIMIT {BATCH_SIZE}
+                ), updated AS (
+                    UPDATE foods SET price_int = foods.price::integer
+                    FROM batch
+                    WHERE foods.id = batch.id AND foods.price_int IS NULL
+                )
+                SELECT max(id) INTO last_id FROM batch;
+                EXIT WHEN last_id IS NULL;
+                COMMIT;
+            END LOOP;
+        END
+        $$;
+        """,
+    ),
+    step(
+        """
+        ALTER TABLE foods ADD CONSTRAINT foods_price_int_not_null
+        CHECK (price_int IS NOT NULL) NOT VALID;
+        """,
+        """
+        ALTER TABLE foods DROP CONSTRAINT foods_price_int_not_null;
+        """,
+    ),
+    step(
+        """
+        ALTER TABLE foods VALIDATE CONSTRAINT foods_price_int_not_null;
+        """,
+    ),
+    step(
+        in_transaction(
+            "DROP TRIGGER foods_sync_price ON foods",
+            "DROP FUNCTION sync_food_price()",
+            "DROP TRIGGER foods_notify_change ON foods",
+            "ALTER TABLE foods DROP COLUMN price",
+            "ALTER TABLE foods RENAME COLUMN price_int TO price",
+            "ALTER TABLE foods ALTER COLUMN price SET NOT NULL",
+            "ALTER TABLE foods DROP CONSTRAINT foods_price_int_not_null",
+            NOTIFY_TRIGGER,
+        ),
+        in_transaction(
+            "DROP TRIGGER foods_notify_change ON foods",
+            "ALTER TABLE foods RENAME COLUMN price TO price_int",
+            "ALTER TABLE foods ALTER COLUMN price_int DROP NOT NULL",
+            "ALTER TABLE foods ADD COLUMN price VARCHAR(255)",
+            "UPDATE foods SET price = price_int::text",
+            NOTIFY_TRIGGER_API_COLUMNS,
+            "ALTER TABLE foods ALTER COLUMN price SET NOT NULL",
+            """
+            ALTER TABLE foods ADD CONSTRAINT foods_price_int_not_null
+            CHECK (price_int IS NOT NULL)
+            """,
+            SYNC_FUNCTION,
+            SYNC_TRIGGER,
+        ),
+    ),
+    step(
+        # The backfill left a dead version of every row behind.
+        """
+        VACUUM (ANALYZE) foods;
+        """,
+    ),
+    step(
+        """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS foods_price_id_idx
+        ON foods (price, id);
+        """,
+        """
+        DROP INDEX CONCURRENTLY IF EXISTS foods_price_id_idx;
+        """,
+    ),
+    step(
+        """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS foods_location_id_price_id_idx
+        ON foods (location_id, price, id);
+        """,
+        """
+        DROP INDEX CONCURRENTLY IF EXISTS foods_location_id_price_id_idx;
+        """,
+    ),
+    step(
+        # Its column leads foods_location_id_price_id_idx.
+        """
+        DROP INDEX CONCURRENTLY IF EXISTS foods_location_id_idx;
+        """,
+        """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS foods_location_id_idx
+        ON foods (location_id);
+        """,
+    ),
+]
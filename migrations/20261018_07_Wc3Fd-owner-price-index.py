@@ -0,0 +1,32 @@
+"""
+owner price index
+"""
+
+from yoyo import step
+
+__depends__ = {"20261018_06_Pr7Kq-food-price-integer"}
+
+# CREATE INDEX CONCURRENTLY can't run inside a transaction block.
+__transactional__ = False
+
+steps = [
+    step(
+        """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS foods_owner_id_price_id_idx
+        ON foods (owner_id, price, id);
+        """,
+        """
+        DROP INDEX CONCURRENTLY IF EXISTS foods_owner_id_price_id_idx;
+        """,
+    ),
+    step(
+        # Its column leads foods_owner_id_price_id_idx.
+        """
+        DROP INDEX CONCURRENTLY IF EXISTS foods_owner_id_idx;
+        """,
+        """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS foods_owner_id_idx
+        ON foods (owner_id);
+        """,
+    ),
+]
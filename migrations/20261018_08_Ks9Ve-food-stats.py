@@ -0,0 +1,268 @@
+"""
+food stats
+
+Per-owner and per-location food count, price sum, min and max price and latest
+food, kept up to date by statement-level triggers on foods.
+
+Each statement's inserted, updated and deleted rows are folded into one delta
+per owner and location, upserted in key order, so a COPY of many foods into a
+few popular owners takes each summary row lock once, always in the same order.
+Counts and sums are exact deltas. Removing the food that held a min, max or
+latest value looks just that value up again. A min or max price is one probe
+of the (owner_id, price, id) or (location_id, price, id) index, the latest id
+an index-only scan of the parent's entries. The upsert has locked the summary
+row by then, so the lookup sees every committed change to that parent.
+
+The backfill holds a SHARE lock on foods, blocking writes while it aggregates.
+"""
+
+from yoyo import step
+
+__depends__ = {"20261018_07_Wc3Fd-owner-price-index"}
+
+steps = [
+    step(
+        """
+        CREATE TABLE owner_food_stats (
+            owner_id VARCHAR(26) PRIMARY KEY,
+            food_count BIGINT NOT NULL,
+            price_sum BIGINT NOT NULL,
+            min_price INTEGER,
+            max_price INTEGER,
+            latest_food_id VARCHAR(26)
+        );
+        """,
+        """
+        DROP TABLE owner_food_stats;
+        """,
+    ),
+    step(
+        """
+        CREATE TABLE location_food_stats (
+            location_id VARCHAR(26) PRIMARY KEY,
+            food_count BIGINT NOT NULL,
+            price_sum BIGINT NOT NULL,
+            min_price INTEGER,
+            max_price INTEGER,
+            latest_food_id VARCHAR(26)
+        );
+        """,
+        """
+        DROP TABLE location_food_stats;
+        """,
+    ),
+    step(
+        """
+        CREATE TYPE food_stats_change AS (
+            owner_id VARCHAR(26),
+            location_id VARCHAR(26),
+            price INTEGER,
+            id VARCHAR(26),
+            n INTEGER
+        );
+        """,
+        """
+        DROP TYPE food_stats_change;
+        """,
+    ),
+    step(
+        """
+        CREATE FUNCTION apply_food_stats(changes food_stats_change[])
+        RETURNS void AS $$
+        BEGIN
+            INSERT INTO owner_food_stats AS s
+            SELECT owner_id, sum(n), sum(n * price),
+                   min(price) FILTER (WHERE n > 0),
+                   max(price) FILTER (WHERE n > 0),
+                   max(id) FILTER (WHERE n > 0)
+            FROM unnest(changes)
+            GROUP BY owner_id
+            ORDER BY owner_id
+            ON CONFLICT (owner_id) DO UPDATE
+            SET food_count = s.food_count + excluded.food_count,
+                price_sum = s.price_sum + excluded.price_sum,
+                min_price = least(s.min_price, excluded.min_price),
+                max_price = greatest(s.max_price, excluded.max_price),
+                latest_food_id = greatest(s.latest_food_id, excluded.latest_food_id);
+
+            UPDATE owner_food_stats AS s
+            SET min_price = CASE WHEN removed.min_price <= s.min_price
+                    THEN (SELECT min(price) FROM foods WHERE owner_id = s.owner_id)
+                    ELSE s.min_price END,
+                max_price = CASE WHEN removed.max_price >= s.max_price
+                    THEN (SELECT max(price) FROM foods WHERE owner_id = s.owner_id)
+                    ELSE s.max_price END,
+                latest_food_id = CASE WHEN removed.latest_food_id >= s.latest_food_id
+                    THEN (SELECT max(id) FROM foods WHERE owner_id = s.owner_id)
+                    ELSE s.latest_food_id END
+            FROM (
+                SELECT owner_id, min(price) AS min_price, max(price) AS max_price,
+                       max(id) AS latest_food_id
+                FROM unnest(changes) WHERE n < 0
+                GROUP BY owner_id
+            ) AS removed
+            WHERE s.owner_id = removed.owner_id
+              AND (removed.min_price <= s.min_price
+                   OR removed.max_price >= s.max_price
+                   OR removed.latest_food_id >= s.latest_food_id);
+
+            DELETE FROM owner_food_stats
+            WHERE food_count <= 0
+              AND owner_id IN (SELECT owner_id FROM unnest(changes) WHERE n < 0);
+
+            INSERT INTO location_food_stats AS s
+            SELECT location_id, sum(n), sum(n * price),
+                   min(price) FILTER (WHERE n > 0),
+                   max(price) FILTER (WHERE n > 0),
+                   max(id) FILTER (WHERE n > 0)
+            FROM unnest(changes)
+            GROUP BY location_id
+            ORDER BY location_id
+            ON CONFLICT (location_id) DO UPDATE
+            SET food_count = s.food_count + excluded.food_count,
+                price_sum = s.price_sum + excluded.price_sum,
+                min_price = least(s.min_price, excluded.min_price),
+                max_price = greatest(s.max_price, excluded.max_price),
+                latest_food_id = greatest(s.latest_food_id, excluded.latest_food_id);
+
+            UPDATE location_food_stats AS s
+            SET min_price = CASE WHEN removed.min_price <= s.min_price
+                    THEN (SELECT min(price) FROM foods
+                          WHERE location_id = s.location_id)
+                    ELSE s.min_price END,
+                max_price = CASE WHEN removed.max_price >= s.max_price
+                    THEN (SELECT max(price) FROM foods
+                          WHERE location_id = s.location_id)
+                    ELSE s.max_price END,
+                latest_food_id = CASE WHEN removed.latest_food_id >= s.latest_food_id
+                    THEN (SELECT max(id) FROM foods
+                          WHERE location_id = s.location_id)
+                    ELSE s.latest_food_id END
+            FROM (
+                SELECT location_id, min(price) AS min_price,
+                       max(price) AS max_price, max(id) AS latest_food_id
+                FROM unnest(changes) WHERE n < 0
+                GROUP BY location_id
+            ) AS removed
+            WHERE s.location_id = removed.location_id
+              AND (removed.min_price <= s.min_price
+                   OR removed.max_price >= s.max_price
+                   OR removed.latest_food_id >= s.latest_food_id);
+
+            DELETE FROM location_food_stats
+            WHERE food_count <= 0
+              AND location_id IN (
+                  SELECT location_id FROM unnest(changes) WHERE n < 0
+              );
+        END;
+        $$ LANGUAGE plpgsql;
+        """,
+        """
+        DROP FUNCTION apply_food_stats(food_stats_change[]);
+        """,
+    ),
+    step(
+        """
+        CREATE FUNCTION count_food_stats() RETURNS trigger AS $$
+        DECLARE
+            changes food_stats_change[];
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                changes := ARRAY(
+                    SELECT (owner_id, location_id, price, id, 1)::food_stats_change
+                    FROM new_foods
+                );
+            ELSIF TG_OP = 'DELETE' THEN
+                changes := ARRAY(
+                    SELECT (owner_id, location_id, price, id, -1)::food_stats_change
+                    FROM old_foods
+                );
+            ELSE
+                -- Only rows whose owner, location or price changed move stats.
+                changes := ARRAY(
+                    SELECT (c.owner_id, c.location_id, c.price, c.id, c.n)
+                               ::food_stats_change
+                    FROM old_foods AS o
+                    JOIN new_foods AS n ON n.id = o.id
+                    CROSS JOIN LATERAL (
+                        VALUES (o.owner_id, o.location_id, o.price, o.id, -1),
+                               (n.owner_id, n.location_id, n.price, n.id, 1)
+                    ) AS c (owner_id, location_id, price, id, n)
+                    WHERE (o.owner_id, o.location_id, o.price)
+                          IS DISTINCT FROM (n.owner_id, n.location_id, n.price)
+                );
+            END IF;
+
+            IF cardinality(changes) > 0 THEN
+                PERFORM apply_food_stats(changes);
+            END IF;
+
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        """,
+        """
+        DROP FUNCTION count_food_stats();
+        """,
+    ),
+    step(
+        """
+        LOCK TABLE foods IN SHARE MODE;
+        """,
+    ),
+    step(
+        """
+        CREATE TRIGGER foods_stats_insert
+        AFTER INSERT ON foods
+        REFERENCING NEW TABLE AS new_foods
+        FOR EACH STATEMENT EXECUTE FUNCTION count_food_stats();
+        """,
+        """
+        DROP TRIGGER foods_stats_insert ON foods;
+        """,
+    ),
+    step(
+        """
+        CREATE TRIGGER foods_stats_update
+        AFTER UPDATE ON foods
+        REFERENCING OLD TABLE AS old_foods NEW TABLE AS new_foods
+        FOR EACH STATEMENT EXECUTE FUNCTION count_food_stats();
+        """,
+        """
+        DROP TRIGGER foods_stats_update ON foods;
+        """,
+    ),
+    step(
+        """
+        CREATE TRIGGER foods_stats_delete
+        AFTER DELETE ON foods
+        REFERENCING OLD TABLE AS old_foods
+        FOR EACH STATEMENT EXECUTE FUNCTION count_food_stats();
+        """,
+        """
+        DROP TRIGGER foods_stats_delete ON foods;
+        """,
+    ),
+    step(
+        """
+        INSERT INTO owner_food_stats
+        SELECT owner_id, count(*), sum(price), min(price), max(price), max(id)
+        FROM foods
+        GROUP BY owner_id;
+        """,
+        """
+        DELETE FROM owner_food_stats;
+        """,
+    ),
+    step(
+        """
+        INSERT INTO location_food_stats
+        SELECT location_id, count(*), sum(price), min(price), max(price), max(id)
+        FROM foods
+        GROUP BY location_id;
+        """,
+        """
+        DELETE FROM location_food_stats;
+        """,
+    ),
+]
@@ -0,0 +1,81 @@
+"""
+location province rollup
+
+Locations per province, kept up to date from location_hierarchy by a trigger,
+so the top level of GET /locations/hierarchy reads one row per province
+instead of aggregating every (province, city, district) row.
+
+Each change to a location_hierarchy row moves its count delta into the
+province's row, so writers of locations in the same province now also queue
+on that row's lock until they commit.
+"""
+
+from yoyo import step
+
+__depends__ = {"20261018_08_Ks9Ve-food-stats"}
+
+steps = [
+    step(
+        """
+        CREATE TABLE location_provinces (
+            province VARCHAR(255) PRIMARY KEY,
+            location_count BIGINT NOT NULL
+        );
+        """,
+        """
+        DROP TABLE location_provinces;
+        """,
+    ),
+    step(
+        """
+        CREATE FUNCTION count_location_provinces() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                UPDATE location_provinces
+                SET location_count = location_count - OLD.location_count
+                WHERE province = OLD.province;
+            END IF;
+
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO location_provinces
+                VALUES (NEW.province, NEW.location_count)
+                ON CONFLICT (province) DO UPDATE
+                SET location_count =
+                    location_provinces.location_count + NEW.location_count;
+            END IF;
+
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                DELETE FROM location_provinces
+                WHERE province = OLD.province AND location_count <= 0;
+            END IF;
+
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        """,
+        """
+        DROP FUNCTION count_location_provinces();
+        """,
+    ),
+    step(
+        """
+        CREATE TRIGGER location_hierarchy_count_provinces
+        AFTER INSERT OR UPDATE OR DELETE ON location_hierarchy
+        FOR EACH ROW EXECUTE FUNCTION count_location_provinces();
+        """,
+        """
+        DROP TRIGGER location_hierarchy_count_provinces ON location_hierarchy;
+        """,
+    ),
+    step(
+        """
+        INSERT INTO location_provinces
+        SELECT province, sum(location_count)
+        FROM location_hierarchy
+        GROUP BY province;
+        """,
+        """
+        DELETE FROM location_provinces;
+        """,
+    ),
+]